@@ -1,22 +1,26 @@
 from tsp_utils.general import *
+from tsp_utils.candidates import shared_candidate_lists, candidate_nearest_route
+from tsp_utils.Tour import Tour
 import random
 import math
-from collections import deque
+import numpy as np
 
 
-def greedy_route(distance_matrix):
-    """Creates a greedy route starting from the first city."""
+def greedy_route(distance_matrix, candidates=None):
+    """Creates a greedy route starting from the first city, optionally looking only at candidate lists."""
+    if candidates is not None:
+        return candidate_nearest_route(0, distance_matrix, candidates)
     num_cities = len(distance_matrix)
-    unvisited = set(range(num_cities))
+    visited = np.zeros(num_cities, dtype=bool)
     current_city = 0
     route = [current_city]
-    unvisited.remove(current_city)
+    visited[current_city] = True
 
-    while unvisited:
+    for _ in range(num_cities - 1):
         # Find the closest unvisited city
-        next_city = min(unvisited, key=lambda city: distance_matrix[current_city][city])
+        next_city = nearest_unvisited(distance_matrix[current_city], visited)
         route.append(next_city)
-        unvisited.remove(next_city)
+        visited[next_city] = True
         current_city = next_city
 
     return route
@@ -45,13 +49,7 @@ def perturb_solution(route):
 
 def route_distance(route, distance_matrix):
     """Calculates the total distance of a route."""
-    distance = 0.0
-    num_cities = len(route)
-    for i in range(num_cities):
-        from_city = route[i]
-        to_city = route[(i + 1) % num_cities]
-        distance += distance_matrix[from_city][to_city]
-    return distance
+    return tour_length(route, distance_matrix)
 
 
 def swap_neighbor(route):
@@ -79,23 +77,99 @@ def scramble_neighbor(route):
 
 
 def neighborhood(route, neighborhood_size):
-    """Generates a set of neighbors using random mutations."""
-    neighbor_functions = [inversion_neighbor]
+    """
+    Generates a set of neighbors using random inversions.
+
+    :return: list of (neighbor_route, (start, end)) where route[start:end] was reversed
+    :rtype: list[tuple(list[int], tuple(int, int))]
+    """
     neighbors = []
     for _ in range(neighborhood_size):
-        neighbor_func = random.choice(neighbor_functions)
-        neighbor_route = neighbor_func(route[:])  # Copy the route
-        neighbors.append(neighbor_route)
+        start, end = sorted(random.sample(range(len(route)), 2))
+        neighbor_route = route[:]  # Copy the route
+        neighbor_route[start:end] = neighbor_route[start:end][::-1]
+        neighbors.append((neighbor_route, (start, end)))
     return neighbors
 
 
-def tabu_search(data_model=None, tabu_size=10, max_iter=100, neighborhood_size=20, stagnation_limit=20, stagnation=0):
+def two_opt_candidates(route, current_distance, distance_matrix):
+    """
+    Enumerates every 2-opt move of a closed tour (reversal of route[start:end]) with its
+    O(1) delta cost, computed for all moves at once without building any candidate route.
+
+    :return: generator of (move, distance, None) sorted by distance (minimization)
+    :rtype: generator
+    """
+    num_cities = len(route)
+    if num_cities < 4:
+        return
+    r = np.asarray(route, dtype=np.intp)
+    starts = np.arange(1, num_cities - 1)[:, None]
+    ends = np.arange(num_cities + 1)[None, :]
+    before = r[starts - 1]
+    first = r[starts]
+    last = r[ends - 1]
+    after = r[ends % num_cities]
+    deltas = (distance_matrix[before, last] + distance_matrix[first, after]
+              - distance_matrix[before, first] - distance_matrix[last, after])
+    # Segments of less than two cities, or covering all but one city, don't change the tour
+    valid = (ends >= starts + 2) & (ends - starts < num_cities - 1)
+    deltas = np.where(valid, deltas, np.inf)
+    flat = deltas.ravel()
+    for index in np.argsort(flat, kind="stable"):
+        if not np.isfinite(flat[index]):
+            break
+        start, end = divmod(int(index), num_cities + 1)
+        yield (start + 1, end), current_distance + float(flat[index]), None
+
+
+def edge_key(city1, city2):
+    """Hashable, direction independent key of the edge between two cities."""
+    return (city1, city2) if city1 < city2 else (city2, city1)
+
+
+def inversion_edges(route, start, end):
+    """
+    Edges removed and added when route[start:end] is reversed in a closed tour.
+
+    :return: tuple (removed_edges, added_edges), each with two edge keys
+    :rtype: tuple(tuple, tuple)
+    """
+    num_cities = len(route)
+    before = route[start - 1]
+    after = route[end % num_cities]
+    first = route[start]
+    last = route[end - 1]
+    removed = (edge_key(before, first), edge_key(last, after))
+    added = (edge_key(before, last), edge_key(first, after))
+    return removed, added
+
+
+def is_tabu(tabu_memory, edges, iteration):
+    """A move is tabu if any of the edges it would add is still forbidden at this iteration."""
+    return any(tabu_memory.get(edge, -1) > iteration for edge in edges)
+
+
+def make_tabu(tabu_memory, edges, iteration, tenure):
+    """Forbids re-adding the given edges for the next tenure iterations."""
+    for edge in edges:
+        tabu_memory[edge] = iteration + tenure
+
+
+def purge_tabu(tabu_memory, iteration):
+    """Drops expired attributes so the memory stays proportional to the tenure."""
+    for edge in [edge for edge, expiry in tabu_memory.items() if expiry <= iteration]:
+        del tabu_memory[edge]
+
+
+def tabu_search(data_model=None, tabu_size=10, max_iter=100, neighborhood_size=20, stagnation_limit=20, stagnation=0,
+                neighborhood_mode="random", candidate_k=None, stopping=None, distance_matrix=None, candidates=None):
     """
     Executes the Tabu Search algorithm with Aspiration Criterion and Diversification.
 
     :param data_model: The problem's data model.
     :type data_model: dict
-    :param tabu_size: Maximum size of the tabu list.
+    :param tabu_size: Tabu tenure; number of iterations a removed edge can't be added back.
     :type tabu_size: int
     :param max_iter: Maximum number of iterations.
     :type max_iter: int
@@ -103,54 +177,89 @@ def tabu_search(data_model=None, tabu_size=10, max_iter=100, neighborhood_size=2
     :type neighborhood_size: int
     :param stagnation_limit: Number of iterations without improvement to trigger diversification.
     :type stagnation_limit: int
+    :param neighborhood_mode: "random" samples neighborhood_size random inversions; "2opt" scans
+        every 2-opt move with delta costs and takes the best allowed one (neighborhood_size is ignored).
+    :type neighborhood_mode: str
+    :param candidate_k: If set, the initial greedy route only looks at the candidate_k nearest cities of each city.
+    :type candidate_k: int
+    :param stopping: Extra stopping rules (time limit, target, stagnation, evaluations); stopping.reason tells
+        which one fired, "max_iter" when the run used every iteration.
+    :type stopping: tsp_utils.stopping.StoppingCriteria
+    :param distance_matrix: Precomputed distance matrix of the locations (computed when not given).
+    :type distance_matrix: numpy.ndarray
+    :param candidates: Precomputed candidate lists sorted by distance, sliced to candidate_k when it is set;
+        the initial greedy route looks only at them.
+    :type candidates: numpy.ndarray
     :return: A tuple with progress, the best route, and the best distance.
     :rtype: tuple
     """
+    if neighborhood_mode not in ("random", "2opt"):
+        raise ValueError(f"Unknown neighborhood mode: {neighborhood_mode}")
+    if stopping is not None:
+        stopping.start()
     # Initialize the problem
     if data_model is None:
         data_model = create_data_model()
     num_cities = len(data_model["locations"])
-    distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
+    if distance_matrix is None:
+        distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
 
     # Create the initial solution
-    current_route = greedy_route(distance_matrix)
+    if candidate_k:
+        candidates = shared_candidate_lists(data_model["locations"], candidate_k, candidates)
+    current_route = greedy_route(distance_matrix, candidates)
+    if neighborhood_mode == "2opt":
+        # The 2-opt moves are applied in place on the tour, flipping its shorter side
+        current_route = Tour(current_route)
     current_distance = route_distance(current_route, distance_matrix)
 
     # Initialize the best solution
     best_route = current_route[:]
     best_distance = current_distance
 
-    # Tabu list
-    tabu_list = deque(maxlen=tabu_size)
+    # Tabu memory: edge removed by a move -> iteration until which adding it back is tabu
+    tabu_memory = {}
 
     # Progress tracker
     progress = []
     no_improvement_count = 0  # Counter for stagnation
+    # Tours evaluated per iteration, for the evaluation budget of the stopping rules
+    evaluations = num_cities * (num_cities - 3) // 2 if neighborhood_mode == "2opt" else neighborhood_size
 
     for iteration in range(max_iter):
         # Generate neighbors and evaluate them
-        neighbors = neighborhood(current_route, neighborhood_size)
-        evaluated_neighbors = [
-            (neighbor, route_distance(neighbor, distance_matrix)) for neighbor in neighbors
-        ]
-        evaluated_neighbors.sort(key=lambda x: x[1])  # Sort by distance (minimization)
+        if neighborhood_mode == "2opt":
+            candidates = two_opt_candidates(current_route, current_distance, distance_matrix)
+        else:
+            neighbors = neighborhood(current_route, neighborhood_size)
+            candidates = [
+                (move, route_distance(neighbor, distance_matrix), neighbor) for neighbor, move in neighbors
+            ]
+            candidates.sort(key=lambda x: x[1])  # Sort by distance (minimization)
 
         # Select the best neighbor with Aspiration Criterion
-        for neighbor, distance in evaluated_neighbors:
-            if neighbor in tabu_list:
-                # Apply Aspiration Criterion
-                if distance < best_distance:
-                    current_route = neighbor
-                    current_distance = distance
-                    break
+        chosen_edges = None
+        for move, distance, neighbor in candidates:
+            removed, added = inversion_edges(current_route, *move)
+            # Tabu moves are only taken if they pass the Aspiration Criterion
+            if is_tabu(tabu_memory, added, iteration) and not distance < best_distance:
+                continue
+            chosen_edges = set(removed) - set(added)
+            if neighbor is None:
+                # Delta evaluated move: apply it in place and refresh the exact distance
+                start, end = move
+                current_route.reverse(start, end - 1)
+                distance = route_distance(current_route, distance_matrix)
             else:
-                # Non-tabu move
                 current_route = neighbor
-                current_distance = distance
-                break
+            current_distance = distance
+            break
 
-        # Update the tabu list
-        tabu_list.append(current_route)
+        # Update the tabu memory
+        if chosen_edges is not None:
+            make_tabu(tabu_memory, chosen_edges, iteration, tabu_size)
+        if iteration % max(tabu_size, 1) == 0:
+            purge_tabu(tabu_memory, iteration)
 
         # Update the best solution
         if current_distance < best_distance:
@@ -169,9 +278,16 @@ def tabu_search(data_model=None, tabu_size=10, max_iter=100, neighborhood_size=2
         if (no_improvement_count >= stagnation_limit) and stagnation == 1:
             print(f"Diversification triggered at iteration {iteration}")
             current_route = perturb_solution(list(best_route))
+            if neighborhood_mode == "2opt":
+                current_route = Tour(current_route)
             current_distance = route_distance(current_route, distance_matrix)
             no_improvement_count = 0  # Reset stagnation counter
 
+        if stopping is not None and stopping.update(best_distance, evaluations):
+            break
+
+    if stopping is not None:
+        print(f"Stopped by: {stopping.finish('max_iter')}")
     return progress, best_route, best_distance
 
 
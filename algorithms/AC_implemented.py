@@ -1,9 +1,13 @@
 
 
 from tsp_utils.general import *
+from tsp_utils.candidates import shared_candidate_lists
+from tsp_utils.local_search import local_search
 import random
 import math
 import numpy as np 
+import multiprocessing
+from multiprocessing import shared_memory
 
 def create_city_order(data_model):
     num_cities = len(data_model["locations"])
@@ -22,58 +26,213 @@ def init_colony(ordered_cities):
         ant_list.append(ant_route)
     return ant_list
 
-def select_city(ant_route,ordered_cities,distance_matrix,pheromone_matrix, alpha, beta):
-    last_city = ant_route[-1]
-    #print(last_city)
-    probabilities = []
-    unvisited = []
-    for city in ordered_cities:
-        if city in ant_route:
-            continue
+def heuristic_matrix(distance_matrix, beta):
+    """
+    Precomputes eta^beta = (1/distance)^beta for every pair of cities.
+    The diagonal is zero so an ant never chooses to stay where it is.
+    """
+    distances = np.asarray(distance_matrix, dtype=np.float64)
+    positive = distances[distances > 0]
+    floor = positive.min() * 1e-3 if positive.size else 1.0
+    eta_beta = (1.0 / np.maximum(distances, floor)) ** beta
+    np.fill_diagonal(eta_beta, 0.0)
+    return eta_beta
+
+def choice_matrix(pheromone_matrix, eta_beta, alpha):
+    """Combines tau^alpha and eta^beta once per generation into the city selection weights."""
+    return (pheromone_matrix ** alpha) * eta_beta
+
+def select_city(current_city, visited, choice_weights):
+    """
+    Roulette wheel selection of the next city using a cumulative sum of the weights.
+
+    :param current_city: city where the ant is
+    :type current_city: int
+    :param visited: Boolean mask with True for the cities already in the ant route
+    :type visited: numpy.ndarray
+    :param choice_weights: Weights computed with choice_matrix
+    :type choice_weights: numpy.ndarray
+    :return: next city to visit
+    :rtype: int
+    """
+    weights = np.where(visited, 0.0, choice_weights[current_city])
+    cumulative = np.cumsum(weights)
+    total = cumulative[-1]
+    if not total > 0:
+        # Every remaining weight underflowed; fall back to an uniform choice
+        return int(np.random.choice(np.flatnonzero(~visited)))
+    next_city = int(np.searchsorted(cumulative, np.random.random() * total, side="right"))
+    return min(next_city, len(cumulative) - 1)
+
+def select_candidate_city(current_city, visited, choice_weights, candidates):
+    """
+    Roulette wheel selection restricted to the candidate list of the current city.
+    Falls back to select_city over every city when all candidates were visited.
+    """
+    candidate_cities = candidates[current_city]
+    weights = np.where(visited[candidate_cities], 0.0, choice_weights[current_city, candidate_cities])
+    cumulative = np.cumsum(weights)
+    total = cumulative[-1] if len(cumulative) else 0.0
+    if not total > 0:
+        return select_city(current_city, visited, choice_weights)
+    index = int(np.searchsorted(cumulative, np.random.random() * total, side="right"))
+    return int(candidate_cities[min(index, len(cumulative) - 1)])
+
+def construct_route(start_city, choice_weights, candidates=None):
+    """Builds a closed tour for one ant starting at start_city."""
+    num_cities = len(choice_weights)
+    visited = np.zeros(num_cities, dtype=bool)
+    visited[start_city] = True
+    route = [start_city]
+    current_city = start_city
+    for _ in range(num_cities - 1):
+        if candidates is None:
+            current_city = select_city(current_city, visited, choice_weights)
         else:
-            distance = distance_matrix[last_city][city]
-            attractiveness = (1/distance)**beta
-            pheromone = (pheromone_matrix[last_city][city])**alpha
-            probabilities.append(pheromone*attractiveness)
-            unvisited.append(city)
-    total_probability = sum(probabilities)
-    probabilities = [p / total_probability for p in probabilities]
+            current_city = select_candidate_city(current_city, visited, choice_weights, candidates)
+        visited[current_city] = True
+        route.append(current_city)
+    route.append(start_city)
+    return route
+
+def construct_colony(start_cities, choice_weights):
+    """
+    Builds the closed tours of all ants at once: every step advances the whole colony with one
+    vectorized roulette over an (ants x cities) visited mask.
+
+    :param start_cities: first city of each ant
+    :type start_cities: list[int]
+    :param choice_weights: Weights computed with choice_matrix
+    :type choice_weights: numpy.ndarray
+    :return: (ants, cities + 1) array of routes, the first city repeated at the end
+    :rtype: numpy.ndarray
+    """
+    start_cities = np.asarray(start_cities, dtype=np.intp)
+    num_ants = len(start_cities)
+    num_cities = len(choice_weights)
+    ants = np.arange(num_ants)
+    routes = np.empty((num_ants, num_cities + 1), dtype=np.intp)
+    routes[:, 0] = start_cities
+    routes[:, -1] = start_cities
+    visited = np.zeros((num_ants, num_cities), dtype=bool)
+    visited[ants, start_cities] = True
+    current = start_cities
+    for step in range(1, num_cities):
+        weights = np.where(visited, 0.0, choice_weights[current])
+        cumulative = np.cumsum(weights, axis=1)
+        totals = cumulative[:, -1]
+        stuck = ~(totals > 0)
+        if stuck.any():
+            # Every remaining weight underflowed; fall back to an uniform choice for those ants
+            cumulative[stuck] = np.cumsum(~visited[stuck], axis=1)
+            totals = cumulative[:, -1]
+        thresholds = np.random.random(num_ants) * totals
+        current = np.minimum((cumulative <= thresholds[:, None]).sum(axis=1), num_cities - 1)
+        visited[ants, current] = True
+        routes[:, step] = current
+    return routes
+
+# Parallel construction: the pheromone, heuristic and distance matrices live in shared memory,
+# each worker builds a chunk of the colony and only routes and lengths come back
+_shared_blocks = []
+_shared_matrices = {}
 
-    next_city = np.random.choice(unvisited, p=probabilities)
+def create_shared_matrix(matrix):
+    """Copies a matrix into a new shared memory block and returns (block, shared ndarray view)."""
+    block = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+    try:
+        shared = np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=block.buf)
+        shared[...] = matrix
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block, shared
 
-    return next_city
+def attach_shared_matrices(block_names, shape):
+    """Pool initializer: maps the shared pheromone, heuristic and distance matrices by name."""
+    for key, name in block_names.items():
+        block = shared_memory.SharedMemory(name=name)
+        _shared_blocks.append(block)
+        _shared_matrices[key] = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+def construct_ants_worker(start_cities, alpha, seed):
+    """Builds the tours of a chunk of ants from the shared matrices and returns (routes, lengths)."""
+    np.random.seed(seed)
+    choice_weights = choice_matrix(_shared_matrices["pheromone"], _shared_matrices["eta_beta"], alpha)
+    routes = construct_colony(start_cities, choice_weights)
+    return routes, tour_lengths(routes, _shared_matrices["distance"])
 
 def route_distance(route, distance_matrix):
     """Calculates the total distance of a route."""
-    distance = 0.0
-    num_cities = len(route)
-    for i in range(num_cities):
-        from_city = route[i]
-        to_city = route[(i + 1) % num_cities]
-        distance += distance_matrix[from_city][to_city]
-    return distance
+    return tour_length(route, distance_matrix)
 
 
                
-def update_pheromone(ant_list,pheromone_matrix,distance_matrix,rho,q_constant):
-    for i in range(len(pheromone_matrix)):
-        for j in range(len(pheromone_matrix[i])):
-            pheromone_matrix[i][j] *= (1 - rho)
+def update_pheromone(ant_list,pheromone_matrix,distance_matrix,rho,q_constant,ant_distances=None):
+    """
+    Evaporates the pheromone matrix in place and deposits q_constant/distance on the
+    edges of every ant route (routes are closed, the first city is repeated at the end).
+    ant_distances can be given to reuse the lengths computed during construction.
+    """
+    pheromone_matrix *= (1 - rho)
 
     # Update pheromone for edges in the ant's path
-    for ant in range(len(ant_list)):
-        distance = route_distance(ant_list[ant],distance_matrix)
-        deposit_pheromone = q_constant/distance
-        for i in range(len(ant_list[ant]) - 1):
-            city1 = ant_list[ant][i]
-            city2 = ant_list[ant][i + 1]
-            pheromone_matrix[city1][city2] += deposit_pheromone
-            pheromone_matrix[city2][city1] += deposit_pheromone
+    routes = np.asarray(ant_list, dtype=np.intp)
+    if ant_distances is None:
+        ant_distances = tour_lengths(routes, distance_matrix)
+    deposit_pheromone = q_constant / np.asarray(ant_distances, dtype=np.float64)
+    deposits = np.repeat(deposit_pheromone, routes.shape[1] - 1)
+    city1 = routes[:, :-1].ravel()
+    city2 = routes[:, 1:].ravel()
+    np.add.at(pheromone_matrix, (city1, city2), deposits)
+    np.add.at(pheromone_matrix, (city2, city1), deposits)
     return pheromone_matrix
 
     
 
 
+# MAX-MIN Ant System defaults (Stuetzle & Hoos): slow evaporation, so the single best ant deposit
+# builds up over many generations, and p_best, the probability of the converged colony rebuilding
+# the best tour, which sets how far tau_min sits below tau_max
+MMAS_RHO = 0.02
+MMAS_P_BEST = 0.05
+
+def pheromone_bounds(best_distance, rho, num_cities, p_best = MMAS_P_BEST):
+    """
+    MAX-MIN limits: tau_max = 1/(rho * L_best) and
+    tau_min = tau_max * (1 - p_best^(1/n)) / ((n/2 - 1) * p_best^(1/n)).
+    """
+    tau_max = 1.0 / (rho * best_distance)
+    p_decision = p_best ** (1.0 / num_cities)
+    average_choices = max(num_cities / 2 - 1, 1)
+    tau_min = tau_max * (1 - p_decision) / (average_choices * p_decision)
+    return min(tau_min, tau_max), tau_max
+
+def update_pheromone_mmas(route,distance,pheromone_matrix,rho,tau_min,tau_max):
+    """
+    MAX-MIN Ant System update: evaporation, deposit of 1/distance only on the edges of the given
+    (iteration-best or global-best) closed route, then clamping to [tau_min, tau_max].
+    """
+    pheromone_matrix *= (1 - rho)
+    route = np.asarray(route, dtype=np.intp)
+    deposit_pheromone = 1.0 / distance
+    pheromone_matrix[route[:-1], route[1:]] += deposit_pheromone
+    pheromone_matrix[route[1:], route[:-1]] += deposit_pheromone
+    np.clip(pheromone_matrix, tau_min, tau_max, out=pheromone_matrix)
+    return pheromone_matrix
+
+def nearest_neighbor_length(distance_matrix, start_city = 0):
+    """Length of the nearest neighbor tour, used to set the initial MAX-MIN pheromone level."""
+    num_cities = len(distance_matrix)
+    visited = np.zeros(num_cities, dtype=bool)
+    visited[start_city] = True
+    route = [start_city]
+    for _ in range(num_cities - 1):
+        route.append(nearest_unvisited(distance_matrix[route[-1]], visited))
+        visited[route[-1]] = True
+    return route_distance(route, distance_matrix)
+
 #def pheromone_update(ant_list,pheromone_matrix,distance_matrix,rho,q_constant,ordered_cities):
 #    for i in len(ordered_cities):
 #       for j in len(ordered_cities): 
@@ -88,34 +247,147 @@ def update_pheromone(ant_list,pheromone_matrix,distance_matrix,rho,q_constant):
 #           pheromone_matrix[i][j] = updated_pheromone
 #    return pheromone_matrix
 
-def ant_colony(data_model,alpha = 1, beta = 2, rho = 0.1, q_constant = 20, generations = 100):
+def ant_colony(data_model,alpha = 1, beta = 2, rho = None, q_constant = 20, generations = 100, candidate_k = None,
+               batch = False, variant = "AS", mmas_deposit = "iteration", stagnation_limit = 100, workers = None,
+               local_search_mode = None, ls_candidate_k = 10, stopping = None, distance_matrix = None,
+               dist = None, candidates = None):
+    """
+    Ant Colony Optimization with one ant starting on each city.
 
-    distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
+    candidate_k restricts the sequential construction to the nearest cities of each city.
+    batch builds all ants together with construct_colony (candidate_k is not used then).
+    variant "AS" lets every ant deposit q_constant/length; "MMAS" is the MAX-MIN Ant System: only
+    the iteration-best or global-best ant (mmas_deposit "iteration" or "global") deposits 1/length,
+    the pheromone is kept in [tau_min, tau_max] (bounds from MMAS_P_BEST) and reset to tau_max after
+    stagnation_limit generations without improvement. rho defaults to 0.1 for AS and MMAS_RHO for
+    MMAS; q_constant is only used by AS.
+    workers > 1 splits the ants of each generation across that many processes that read the
+    matrices from shared memory (construction is batched in each worker).
+    local_search_mode "all" or "best" improves every ant, or only the iteration-best ant, with
+    neighbor-list 2-opt/Or-opt (ls_candidate_k neighbors) before the pheromone update.
+    stopping (tsp_utils.stopping.StoppingCriteria) can end the run before the last generation;
+    its reason attribute tells which criterion fired ("generations" when none did). Its deadline is
+    also checked after every ant built or improved one by one, so a generation ends early with the
+    ants done so far.
+    distance_matrix, dist (its nested list view) and candidates (candidate lists sorted by distance,
+    sliced to candidate_k and ls_candidate_k) can be given to reuse structures already computed for
+    the locations.
+    """
+    if variant not in ("AS", "MMAS"):
+        raise ValueError(f"Unknown ant colony variant: {variant}")
+    if mmas_deposit not in ("iteration", "global"):
+        raise ValueError(f"Unknown MAX-MIN deposit rule: {mmas_deposit}")
+    if local_search_mode not in (None, "all", "best"):
+        raise ValueError(f"Unknown local search mode: {local_search_mode}")
+    if rho is None:
+        rho = MMAS_RHO if variant == "MMAS" else 0.1
+    if stopping is not None:
+        stopping.start()
+
+    if distance_matrix is None:
+        distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
     num_cities = len(data_model["locations"])
     ordered_cities = create_city_order(data_model)
     ant_list = init_colony(ordered_cities)    
     pheromone_matrix = np.ones((num_cities,num_cities))
+    if variant == "MMAS":
+        tau_min, tau_max = pheromone_bounds(nearest_neighbor_length(distance_matrix), rho, num_cities)
+        pheromone_matrix.fill(tau_max)
+        no_improvement = 0
+    eta_beta = heuristic_matrix(distance_matrix, beta)
+    # Optional candidate lists: ants only roulette among the candidate_k nearest cities
+    shared_candidates = candidates
+    candidates = None
+    if candidate_k:
+        candidates = shared_candidate_lists(data_model["locations"], candidate_k, shared_candidates)
+    if local_search_mode is not None:
+        ls_candidates = shared_candidate_lists(data_model["locations"], ls_candidate_k, shared_candidates).tolist()
+        if dist is None:
+            dist = as_nested_list(distance_matrix)
     best_distance = 0
     solution = []
 
-    for g in range(generations):
-        for ant in range(len(ant_list)):
-            while len(ant_list[ant]) < num_cities:
-                next_city = select_city(ant_list[ant],ordered_cities,distance_matrix,pheromone_matrix, alpha, beta)
-                ant_list[ant].append(next_city)
-            first_city = ant_list[ant][0]
-            ant_list[ant].append(first_city)
-            distance = route_distance(ant_list[ant],distance_matrix)
-            if best_distance == 0 or distance < best_distance:
-                best_distance = distance
-                solution = ant_list[ant]
-        if g % 20 == 0:
-            print(f"Generation {g:4d} distance: {best_distance:.2f}")
-        pheromone_matrix = update_pheromone(ant_list,pheromone_matrix,distance_matrix,rho,q_constant)
-        ant_list.clear()
-        ant_list = init_colony(ordered_cities)
+    pool = None
+    blocks = []
+    # The shared blocks and the pool are created inside the try, so the finally below unlinks the
+    # blocks even when an allocation or the pool initializer fails
+    try:
+        if workers is not None and workers > 1:
+            matrices = {"pheromone": pheromone_matrix, "eta_beta": eta_beta,
+                        "distance": np.asarray(distance_matrix, dtype=np.float64)}
+            shared = {}
+            for key, matrix in matrices.items():
+                block, shared[key] = create_shared_matrix(matrix)
+                blocks.append(block)
+            # From here on the pheromone updates happen in place on the shared matrix
+            pheromone_matrix = shared["pheromone"]
+            pool = multiprocessing.Pool(workers, initializer=attach_shared_matrices,
+                                        initargs=({key: block.name for key, block in zip(matrices, blocks)},
+                                                  (num_cities, num_cities)))
+            chunks = [chunk for chunk in np.array_split(np.asarray(ordered_cities), workers) if len(chunk)]
+
+        for g in range(generations):
+            if pool is not None:
+                seeds = np.random.randint(0, 2**31, size=len(chunks))
+                results = pool.starmap(construct_ants_worker,
+                                       [(chunk, alpha, int(seed)) for chunk, seed in zip(chunks, seeds)])
+                ant_list = np.concatenate([routes for routes, _ in results])
+                ant_distances = np.concatenate([lengths for _, lengths in results])
+            elif batch:
+                choice_weights = choice_matrix(pheromone_matrix, eta_beta, alpha)
+                ant_list = construct_colony(ordered_cities, choice_weights)
+                ant_distances = tour_lengths(ant_list, distance_matrix)
+            else:
+                choice_weights = choice_matrix(pheromone_matrix, eta_beta, alpha)
+                ant_distances = []
+                for ant in range(len(ant_list)):
+                    ant_list[ant] = construct_route(ant_list[ant][0], choice_weights, candidates)
+                    ant_distances.append(route_distance(ant_list[ant],distance_matrix))
+                    if stopping is not None and stopping.expired():
+                        ant_list = ant_list[:ant + 1]
+                        break
+            if local_search_mode is not None:
+                improve = range(len(ant_list)) if local_search_mode == "all" else [int(np.argmin(ant_distances))]
+                for ant in improve:
+                    ant_list[ant], ant_distances[ant] = local_search(list(ant_list[ant]), distance_matrix,
+                                                                     ls_candidates, dist=dist)
+                    if stopping is not None and stopping.expired():
+                        break
+            best_ant = int(np.argmin(ant_distances))
+            previous_best = best_distance
+            improved = previous_best == 0 or ant_distances[best_ant] < previous_best
+            if improved:
+                best_distance = float(ant_distances[best_ant])
+                solution = list(ant_list[best_ant])
+            if g % 20 == 0:
+                print(f"Generation {g:4d} distance: {best_distance:.2f}")
+            if stopping is not None and stopping.update(best_distance, len(ant_distances)):
+                break
+            if variant == "MMAS":
+                no_improvement = 0 if improved else no_improvement + 1
+                tau_min, tau_max = pheromone_bounds(best_distance, rho, num_cities)
+                if mmas_deposit == "global":
+                    deposit_route, deposit_distance = solution, best_distance
+                else:
+                    deposit_route, deposit_distance = ant_list[best_ant], ant_distances[best_ant]
+                pheromone_matrix = update_pheromone_mmas(deposit_route,deposit_distance,pheromone_matrix,rho,tau_min,tau_max)
+                if no_improvement >= stagnation_limit:
+                    pheromone_matrix.fill(tau_max)
+                    no_improvement = 0
+            else:
+                pheromone_matrix = update_pheromone(ant_list,pheromone_matrix,distance_matrix,rho,q_constant,ant_distances)
+            ant_list = init_colony(ordered_cities)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for block in blocks:
+            block.close()
+            block.unlink()
+    if stopping is not None:
+        print(f"Stopped by: {stopping.finish('generations')}")
     print(best_distance)    
-    return solution, best_distance
+    return [int(city) for city in solution], best_distance
 
 if __name__ == "__main__":
 
@@ -1,38 +1,43 @@
 from tsp_utils.general import *
 from tsp_utils.Being import Being
 from tsp_utils.mutation import *
+from tsp_utils.candidates import candidate_nearest_route, shared_candidate_lists
+from tsp_utils.crossover import get_crossover, order_crossover, batch_order_crossover, make_eax_crossover, CROSSOVER_OPERATORS
+from tsp_utils.local_search import local_search
+from tsp_utils.lineage import EventStream
+from tsp_utils.stopping import StoppingCriteria
+from functools import partial
+import numpy as np
+import multiprocessing
+import os
+import queue
+import time
+import traceback
 
 #  - MUST: Fill this being data accordingly 
 #  - EXTRA: Try to make the algorithm better. Right now is working "ok"
 
-def nearest_neighbor_route(start_city, distance_matrix):
+def nearest_neighbor_route(start_city, distance_matrix, candidates=None):
+    if candidates is not None:
+        return candidate_nearest_route(start_city, distance_matrix, candidates)
     num_cities = len(distance_matrix)
-    unvisited = set(range(num_cities))
+    visited = np.zeros(num_cities, dtype=bool)
     route = [start_city]
-    unvisited.remove(start_city)
+    visited[start_city] = True
     current_city = start_city
 
-    while unvisited:
-        next_city = min(unvisited, key=lambda city: distance_matrix[current_city][city])
+    for _ in range(num_cities - 1):
+        next_city = nearest_unvisited(distance_matrix[current_city], visited)
         route.append(next_city)
-        unvisited.remove(next_city)
+        visited[next_city] = True
         current_city = next_city
 
     return route
 
-def greedy_route(distance_matrix):
+def greedy_route(distance_matrix, candidates=None):
     num_cities = len(distance_matrix)
     start_city = random.randint(0, num_cities - 1)
-    route = [start_city]
-    unvisited = set(range(num_cities)) - {start_city}
-
-    while unvisited:
-        current_city = route[-1]
-        next_city = min(unvisited, key=lambda city: distance_matrix[current_city][city])
-        route.append(next_city)
-        unvisited.remove(next_city)
-
-    return route
+    return nearest_neighbor_route(start_city, distance_matrix, candidates)
 
 def initial_population(num_cities, population_size, distance_m):
     '''
@@ -83,18 +88,11 @@ def route_distance(route, distance_matix):
     :param route: Tour; route to have total distance calculated
     :type route: list[int]
     :param distance_matix: Matrix with the distance form point to point
-    :type distance_matix: dict
+    :type distance_matix: numpy.ndarray
     :return: total distance of a route
     :rtype: float
     '''
-    
-    distance = 0.0
-    num_cities = len(route)
-    for i in range(num_cities):
-        from_city = route[i]
-        to_city = route[(i + 1) % num_cities]
-        distance += distance_matix[from_city][to_city]
-    return distance
+    return tour_length(route, distance_matix)
 
 
 def fitness(route, distance_matrix):
@@ -104,29 +102,44 @@ def fitness(route, distance_matrix):
     :param route: tour to be executed
     :type route: list[int]
     :param distance_matix: Matrix with the distance form point to point
-    :type distance_matix: dict
+    :type distance_matix: numpy.ndarray
     :return: metric to indicate how good is the route (the grater the better)
     :rtype: float
     '''
     
     return 1.0 / route_distance(route, distance_matrix)
 
+def population_lengths(population, distance_matrix):
+    '''
+    Calculates the tour length of every being of the population in one batch
+
+    :param population: current population
+    :type population: list[Being]
+    :param distance_matix: Matrix with the distance form point to point
+    :type distance_matix: numpy.ndarray
+    :return: tour length of each being, in the same order as the population
+    :rtype: numpy.ndarray
+    '''
+    return tour_lengths([being.route for being in population], distance_matrix)
+
 def rank_routes(population, distance_matrix):
     '''
-    Ranks routes in the population based on fitness
+    Ranks routes in the population based on fitness. Only beings without a cached length
+    (new or changed routes) are evaluated, and the sort is stable on an already ranked population,
+    so ranking it again costs a single pass.
 
     :param population: current population
     :type population: list[list[int]]
     :param distance_matix: Matrix with the distance form point to point
-    :type distance_matix: dict
+    :type distance_matix: numpy.ndarray
     :return: population resorted based on best route 
     :rtype: list[list[int]]
     '''
-    fitness_results = []
-    for being in population:
-        f = fitness(being.route, distance_matrix)
-        being.fitness = f
-        fitness_results.append(f)
+    dirty = [being for being in population if being.length is None]
+    if dirty:
+        lengths = population_lengths(dirty, distance_matrix)
+        for being, length in zip(dirty, lengths.tolist()):
+            being.set_length(length)
    
     sorted_population = sort_population_by_fitness(population)
     return sorted_population
@@ -154,52 +167,35 @@ def selection(pop_ranked, elite_size = 3, tournament_size = 3):
     selection_results = []
     for elite in range(elite_size):
         selection_results.append(pop_ranked[elite])
+    # pop_ranked is sorted by fitness, so the winner of a tournament is the lowest sampled rank
+    ranks = range(len(pop_ranked))
     for _ in range(len(pop_ranked) - elite_size):
-        tournament_candidates = random.sample(pop_ranked, tournament_size)
-        sorted = sort_population_by_fitness(tournament_candidates)
-        winner = sorted[0]
+        winner = pop_ranked[min(random.sample(ranks, tournament_size))]
         selection_results.append(winner)
     return selection_results
 
-def breed(parent1, parent2, gen):
+def breed(parent1, parent2, gen, crossover = order_crossover):
     '''
-    Breeds two parents to generate a new elements.Performs Order Crossover (OX) to create a child route
+    Breeds two parents to generate a new elements. Uses the given crossover operator, Order Crossover (OX) by default
 
     :param parent1: First parent
-    :type parent1: list[int]
+    :type parent1: Being
     :param parent2: Second parent
-    :type parent2: list[int]
+    :type parent2: Being
+    :param crossover: Function (parent1_route, parent2_route) -> child_route, defaults to order_crossover
+    :type crossover: callable, optional
     :return: Newly generate child
-    :rtype: list[int]
+    :rtype: Being
     '''
     
-    num_cities = len(parent1.route)
-    child_route = [None] * num_cities
-
-    # Select a subset from parent1
-    gene_a = int(random.random() * num_cities)
-    gene_b = int(random.random() * num_cities)
-
-    start_gene = min(gene_a, gene_b)
-    end_gene = max(gene_a, gene_b)
-
-    # Copy the subset to the child
-    child_route[start_gene:end_gene] = parent1.route[start_gene:end_gene]
-
-    # Fill the remaining positions with genes from parent2
-    parent2_genes = [gene for gene in parent2.route if gene not in child_route]
-    current_pos = 0
-    for i in range(num_cities):
-        if child_route[i] is None:
-            child_route[i] = parent2_genes[current_pos]
-            current_pos += 1
+    child_route = crossover(parent1.route, parent2.route)
     parents_ids = [parent1.id, parent2.id]
     mutation = 0
     
     child = Being(child_route, parents_ids, mutation, gen)
     return child
 
-def breed_population(mating_pool, elite_size = 3, gen = 0):
+def breed_population(mating_pool, elite_size = 3, gen = 0, max_retries = 10, crossover = "ox", stopping = None):
     '''
     Creates a new population through crossover.
 
@@ -207,28 +203,53 @@ def breed_population(mating_pool, elite_size = 3, gen = 0):
     :type mating_pool: list[list[int]]
     :param elite_size: Elite size/elements that will be copied directly, defaults to 3
     :type elite_size: int, optional
+    :param max_retries: Breeding attempts for a child whose tour is already in the population, at least one, defaults to 10
+    :type max_retries: int, optional
+    :param crossover: Crossover name from tsp_utils.crossover ("ox", "pmx", "cx", "erx"), a crossover function,
+        or "batch_ox" to breed all children with one vectorized OX, defaults to "ox"
+    :type crossover: str | callable, optional
+    :param stopping: Criteria whose deadline is checked before each child; once it passed, the remaining
+        slots keep their first parent, defaults to None
+    :type stopping: tsp_utils.stopping.StoppingCriteria, optional
     :return: new part of the population
     :rtype: list[list[int]]
     '''
     children = []
     length = len(mating_pool)
     pool = random.sample(mating_pool, len(mating_pool))
+    seen = set()
 
     #direct copy of the elite
     for i in range(elite_size):
         children.append(mating_pool[i])
+        seen.add(canonical_route_key(mating_pool[i].route))
+
+    batch = crossover == "batch_ox"
+    crossover_func = order_crossover if batch else get_crossover(crossover)
+    if batch and length > elite_size:
+        parents1 = [pool[i - elite_size].route for i in range(elite_size, length)]
+        parents2 = [pool[length - i - 1].route for i in range(elite_size, length)]
+        batch_routes = batch_order_crossover(parents1, parents2).tolist()
 
-    invalid_new_child = True
     #the rest
     for i in range(elite_size, length):
-        while (invalid_new_child):
-            child = breed(pool[i - elite_size], pool[length - i - 1], gen)
-            invalid_new_child = False
-            for valid_child in children:
-                if(valid_child == child):
-                    invalid_new_child = True
+        parent1, parent2 = pool[i - elite_size], pool[length - i - 1]
+        if stopping is not None and stopping.expired():
+            # Out of time: the population keeps its size and this generation is the last one
+            children.append(parent1)
+            continue
+        # At least one child is bred, whatever max_retries is
+        for attempt in range(max(1, max_retries)):
+            if batch and attempt == 0:
+                child = Being(batch_routes[i - elite_size], [parent1.id, parent2.id], 0, gen)
+            else:
+                child = breed(parent1, parent2, gen, crossover_func)
+            key = canonical_route_key(child.route)
+            if key not in seen:
+                break
+        # After max_retries a duplicate is kept (e.g. both parents are the same tour)
+        seen.add(key)
         children.append(child)
-        invalid_new_child = True
     return children
 
 
@@ -252,12 +273,12 @@ def mutate(being, mutation_rate=0.01):
             mutation_func = random.choice(mutation_functions)
             route = mutation_func(route)
             being.update_mutation_number(1,mutation_func.__name__)
-            being.route = route
+            being.set_route(route)
     return being
 
 
 
-def mutate_population(population, mutation_rate=0.01, elite_size = 3 ):
+def mutate_population(population, mutation_rate=0.01, elite_size = 3, max_retries = 10):
     '''
     Applies mutation to the population.
 
@@ -265,54 +286,162 @@ def mutate_population(population, mutation_rate=0.01, elite_size = 3 ):
     :type population: list[list[int]]
     :param mutation_rate: possibility of mutation, defaults to 0.01 (1%)
     :type mutation_rate: float, optional
+    :param max_retries: Extra mutation attempts for a being whose tour is already in the population, defaults to 10
+    :type max_retries: int, optional
     :return: Mutated population 
     :rtype: list[list[int]]
     '''
     mutated_pop = []
+    seen = set()
    
     for i in range(elite_size):
         mutated_pop.append(population[i])
-    invalid_mutation = True
+        seen.add(canonical_route_key(population[i].route))
     length = len(population)
     #the rest
     for i in range(elite_size, length):
-        while (invalid_mutation):
-            mutated = mutate(population[i],mutation_rate)
-            invalid_mutation = False
-            for valid_being in mutated_pop:
-                if(valid_being == mutated):
-                    invalid_mutation = True
+        mutated = mutate(population[i],mutation_rate)
+        key = canonical_route_key(mutated.route)
+        for _ in range(max_retries):
+            if key not in seen:
+                break
+            mutated = mutate(mutated,mutation_rate)
+            key = canonical_route_key(mutated.route)
+        seen.add(key)
         mutated_pop.append(mutated)
-        invalid_mutation = True
     return mutated_pop
 
-def next_generation(genID, current_gen, distance_matrix,mutation_rate = 0.01, tournament_size = 3, elite_size = 3):
+def improve_population(population, distance_matrix, candidates, elite_size = 3, max_moves = 100, dist = None,
+                       stopping = None):
+    '''
+    Memetic step: every being after the elite goes through a bounded 2-opt/Or-opt descent over
+    the candidate lists. The length found by the local search is cached on the being, so the next
+    ranking does not evaluate it again.
+
+    :param population: Population after mutation
+    :type population: list[Being]
+    :param distance_matix: Matrix with the distance form point to point
+    :type distance_matix: numpy.ndarray
+    :param candidates: Candidate lists built with tsp_utils.candidates
+    :type candidates: list[list[int]]
+    :param elite_size: Elite size/elements that are already improved, defaults to 3
+    :type elite_size: int, optional
+    :param max_moves: Maximum improving moves per being, defaults to 100 (None runs to a local optimum)
+    :type max_moves: int, optional
+    :param dist: Nested list view of the matrix (as_nested_list), defaults to None
+    :type dist: list[list[float]], optional
+    :param stopping: Criteria whose deadline is checked before each being; once it passed, the rest are
+        left as they are, defaults to None
+    :type stopping: tsp_utils.stopping.StoppingCriteria, optional
+    :return: improved population
+    :rtype: list[Being]
+    '''
+    for being in population[elite_size:]:
+        if stopping is not None and stopping.expired():
+            break
+        route, length = local_search(being.route, distance_matrix, candidates, max_moves=max_moves, dist=dist)
+        being.set_route(route)
+        being.set_length(length)
+    return population
+
+def memetic_step(locations, distance_matrix, candidate_k = 10, max_moves = 100, candidates = None, dist = None):
+    '''
+    Builds the local search step used by next_generation in the memetic mode.
+
+    :param candidates: Precomputed candidate lists to take the candidate_k neighbors from, defaults to None
+    :type candidates: numpy.ndarray, optional
+    :param dist: Nested list view of the matrix (as_nested_list), defaults to None (computed here)
+    :type dist: list[list[float]], optional
+    :return: function (population, elite_size, stopping) -> population
+    :rtype: callable
+    '''
+    candidates = shared_candidate_lists(locations, candidate_k, candidates).tolist()
+    if dist is None:
+        dist = as_nested_list(distance_matrix)
+    return partial(improve_population, distance_matrix=distance_matrix, candidates=candidates,
+                   max_moves=max_moves, dist=dist)
+
+def resolve_crossover(crossover, locations, distance_matrix, candidate_k = 10, candidates = None, dist = None):
+    '''
+    Builds the problem dependent crossover operators: "eax" needs the distances and the candidate
+    lists for its subtour repair. Other names and functions are returned unchanged.
+
+    :param crossover: Crossover operator, see breed_population, or "eax"
+    :type crossover: str | callable
+    :param locations: position of the cities
+    :type locations: list[tuple]
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param candidate_k: Candidate list size used by EAX, defaults to 10
+    :type candidate_k: int, optional
+    :param candidates: Precomputed candidate lists to take the candidate_k neighbors from, defaults to None
+    :type candidates: numpy.ndarray, optional
+    :param dist: Nested list view of the matrix (as_nested_list), defaults to None
+    :type dist: list[list[float]], optional
+    :return: crossover operator accepted by breed_population
+    :rtype: str | callable
+    '''
+    if crossover == "eax":
+        return make_eax_crossover(distance_matrix, shared_candidate_lists(locations, candidate_k, candidates),
+                                  dist=dist)
+    return crossover
+
+def validate_parameters(population_size, elite_size, crossover, memetic, ls_max_moves, ls_candidate_k):
+    '''
+    Checks the GA parameters up front, so a bad value fails in the caller instead of inside a
+    worker process.
+
+    :raises ValueError: Invalid parameter
+    '''
+    if not callable(crossover) and crossover not in CROSSOVER_OPERATORS and crossover not in ("batch_ox", "eax"):
+        raise ValueError(f"Unknown crossover operator: {crossover}")
+    if not isinstance(memetic, bool):
+        raise ValueError(f"memetic must be True or False, got {memetic!r}")
+    if memetic and ls_max_moves is not None and ls_max_moves < 1:
+        raise ValueError("ls_max_moves must be at least 1 (or None for a full descent).")
+    if (memetic or crossover == "eax") and ls_candidate_k < 1:
+        raise ValueError("ls_candidate_k must be at least 1.")
+    if population_size <= elite_size or elite_size < 0:
+        raise ValueError("population_size must be larger than elite_size (and elite_size not negative).")
+
+def next_generation(genID, current_gen, distance_matrix,mutation_rate = 0.01, tournament_size = 3, elite_size = 3,
+                    crossover = "ox", improve = None, stopping = None):
     '''
     Creates the next generation.
 
     :param current_gen: Current population
     :type current_gen: list[list[int]]
     :param distance_matix: Matrix with the distance form point to point
-    :type distance_matix: dict
+    :type distance_matix: numpy.ndarray
     :param mutation_rate: possibility of mutation, defaults to 0.01
     :type mutation_rate: float, optional
     :param tournament_size: Size of the tournament/number of elements selected to find the best to breed, defaults to 3
     :type tournament_size: int, optional
     :param elite_size: Elite size/elements that will be copied directly, defaults to 3
     :type elite_size: int, optional
-    :return: new generation 
-    :rtype: list[list[int]]
+    :param crossover: Crossover operator, see breed_population, defaults to "ox"
+    :type crossover: str | callable, optional
+    :param improve: Local search step applied after mutation (see memetic_step), defaults to None
+    :type improve: callable, optional
+    :param stopping: Criteria whose deadline is also checked while breeding and improving, defaults to None
+    :type stopping: tsp_utils.stopping.StoppingCriteria, optional
+    :return: new generation, ranked (the best being first)
+    :rtype: list[Being]
     '''
-    
+    # No evaluation when current_gen comes ranked from the previous call
     pop_ranked = rank_routes(current_gen, distance_matrix)
     selection_results = selection(pop_ranked, elite_size, tournament_size)
     mating_pool = selection_results
-    children = breed_population(mating_pool, elite_size, genID)
+    children = breed_population(mating_pool, elite_size, genID, crossover=crossover, stopping=stopping)
     next_gen = mutate_population(children,mutation_rate)
-    return next_gen
+    if improve is not None:
+        next_gen = improve(next_gen, elite_size=elite_size, stopping=stopping)
+    return rank_routes(next_gen, distance_matrix)
 
 def GA_implemented(data_model = None,population_size = 100, num_generations = 100, mutation_rate = 0.01,
-                   tournament_size = 3, elite_size = 3):
+                   tournament_size = 3, elite_size = 3, crossover = "ox", memetic = False, ls_max_moves = 100,
+                   ls_candidate_k = 10, lineage = None, event_log = None, stopping = None, distance_matrix = None,
+                   dist = None, candidates = None):
     '''
     Execute the genetic algorithm (GA) proposed
 
@@ -328,39 +457,287 @@ def GA_implemented(data_model = None,population_size = 100, num_generations = 10
     :type tournament_size: int, optional
     :param elite_size: Elite size/elements that will be copied directly, defaults to 3
     :type elite_size: int, optional
+    :param crossover: Crossover operator, see breed_population, or "eax" for Edge Assembly Crossover, defaults to "ox"
+    :type crossover: str | callable, optional
+    :param memetic: Improve every child with neighbor-list 2-opt/Or-opt (see improve_population), defaults to False
+    :type memetic: bool, optional
+    :param ls_max_moves: Maximum improving moves of the local search per child, defaults to 100
+    :type ls_max_moves: int, optional
+    :param ls_candidate_k: Candidate list size of the local search, defaults to 10
+    :type ls_candidate_k: int, optional
+    :param lineage: Log that records parents and mutations of every being (tsp_utils.lineage.LineageLog),
+        defaults to None (no lineage tracking)
+    :type lineage: LineageLog, optional
+    :param event_log: Path of an append-only event file (births, parents, mutations, lengths per
+        generation) written in batches during the run, see tsp_utils.lineage.read_events. Defaults to None
+    :type event_log: str, optional
+    :param stopping: Extra stopping rules (time limit, target, stagnation, evaluations); its reason attribute
+        tells which one fired, "generations" when the run used all num_generations. Defaults to None
+    :type stopping: tsp_utils.stopping.StoppingCriteria, optional
+    :param distance_matrix: Precomputed distance matrix of the locations, defaults to None (computed here)
+    :type distance_matrix: numpy.ndarray, optional
+    :param dist: Precomputed nested list view of the matrix for EAX and the memetic mode, defaults to None
+    :type dist: list[list[float]], optional
+    :param candidates: Precomputed candidate lists (sorted by distance) that EAX and the memetic mode slice
+        their neighbors from, defaults to None (built here)
+    :type candidates: numpy.ndarray, optional
+    :raises ValueError: lineage and event_log are mutually exclusive
     :return: tuple with a list of the distances for each generation, the best route and the distance for the best route
     :rtype: tuple(list[int], list[int], int)
     '''
+    if lineage is not None and event_log is not None:
+        raise ValueError("Use either lineage or event_log, not both.")
+    if stopping is not None:
+        stopping.start()
+    events = EventStream(event_log) if event_log is not None else None
     Being.reset_ids()
-    # Define the number of cities and the population size
-    #locations = generate_form_points(4,"square")
-    if(data_model == None):
-        data_model = create_data_model()
+    Being.set_lineage_log(events if events is not None else lineage)
+    # The stream is closed and the lineage hook removed even when the run raises
+    try:
+        # Define the number of cities and the population size
+        #locations = generate_form_points(4,"square")
+        if(data_model == None):
+            data_model = create_data_model()
         
-    num_cities = len(data_model["locations"])
+        num_cities = len(data_model["locations"])
     
 
-    # Calculate the distance matrix between all pairs of cities
-    distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
-    #pop = initial_population_nearest_neighbor(num_cities, population_size, distance_matrix)
-    pop = initial_population(num_cities, population_size,distance_matrix)
-    progress = []
+        # Calculate the distance matrix between all pairs of cities
+        if distance_matrix is None:
+            distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
+        if (memetic or crossover == "eax") and dist is None:
+            dist = as_nested_list(distance_matrix)
+        crossover = resolve_crossover(crossover, data_model["locations"], distance_matrix, candidates=candidates, dist=dist)
+        improve = None
+        if memetic:
+            improve = memetic_step(data_model["locations"], distance_matrix, ls_candidate_k, ls_max_moves,
+                                   candidates, dist)
+        #pop = initial_population_nearest_neighbor(num_cities, population_size, distance_matrix)
+        pop = initial_population(num_cities, population_size,distance_matrix)
+        if improve is not None:
+            pop = improve(pop, elite_size=0, stopping=stopping)
+        progress = []
+
+        pop = rank_routes(pop, distance_matrix)
+        if events is not None:
+            events.evaluations(pop, 0)
+        print("Initial distance: " + str(pop[0].length))
+
+        for i in range(num_generations):
+            pop = next_generation(i+1,pop,distance_matrix,mutation_rate,tournament_size,elite_size,crossover,improve,
+                                  stopping)
+            if events is not None:
+                events.evaluations(pop, i+1)
+            best_distance = pop[0].length
+            progress.append(best_distance)
+            if i % 20 == 0:
+                print(f"Generation {i:4d} distance: {best_distance:.2f}")
+            if stopping is not None and stopping.update(best_distance, len(pop) - elite_size):
+                break
+
+        if stopping is not None:
+            print(f"Stopped by: {stopping.finish('generations')}")
+        best_distance = pop[0].length
+        best_route = list(pop[0].route)
+        best_route.append(best_route[0])
+        print("Final distance: " + str(best_distance))
+        print(pop[0].get_info())
+    finally:
+        Being.set_lineage_log(None)
+        if events is not None:
+            events.close()
+    return (progress, best_route,  best_distance)
+
+def island_worker(**island_args):
+    '''
+    Process target of the island model: runs run_island with the given keyword arguments, and puts
+    (island_id, None, traceback, None) in the results queue when it fails so the parent does not
+    wait forever.
+    '''
+    try:
+        run_island(**island_args)
+    except BaseException:
+        island_args["results"].put((island_args["island_id"], None, traceback.format_exc(), None))
 
-    print("Initial distance: " + str(1 / rank_routes(pop, distance_matrix)[0].fitness))
+def island_event_log(event_log, island_id):
+    """Event file of one island: <event_log>.<island_id>."""
+    return f"{event_log}.{island_id}"
 
-    for i in range(num_generations):
-        pop = next_generation(i+1,pop,distance_matrix,mutation_rate,tournament_size,elite_size)
-        best_distance = 1 / rank_routes(pop,distance_matrix)[0].fitness
-        progress.append(best_distance)
-        if i % 20 == 0:
-            print(f"Generation {i:4d} distance: {best_distance:.2f}")
+def receive_immigrants(inbox, stopping):
+    '''
+    Waits for the routes sent by the previous island of the ring. With a deadline, gives up once it
+    passed (the sender may have stopped already) and returns None.
+    '''
+    if stopping is None:
+        return inbox.get()
+    while True:
+        try:
+            return inbox.get(timeout=0.05)
+        except queue.Empty:
+            if stopping.expired():
+                return None
+
+def run_island(island_id, locations, population_size, num_generations, mutation_rate, tournament_size,
+               elite_size, migration_interval, migration_size, inboxes, results, seed, crossover = "ox",
+               memetic = False, ls_max_moves = 100, ls_candidate_k = 10, deadline = None, event_log = None):
+    '''
+    Runs one island of the island model: a regular GA population that, every migration_interval
+    generations, sends copies of its best routes to the next island of the ring and replaces its
+    worst beings with the routes received from the previous one. Every island stops at the same
+    deadline (time.time() value), and writes its own event file when event_log is given.
+    '''
+    random.seed(seed)
+    np.random.seed(seed % (2**32))
+    Being.reset_ids()
+    stopping = StoppingCriteria(time_limit=max(0.0, deadline - time.time())) if deadline is not None else None
+    events = EventStream(island_event_log(event_log, island_id)) if event_log is not None else None
+    Being.set_lineage_log(events)
+    stopped_early = False
+    try:
+        num_islands = len(inboxes)
+        distance_matrix = compute_euclidean_distance_matrix(locations)
+        dist = as_nested_list(distance_matrix) if memetic or crossover == "eax" else None
+        crossover = resolve_crossover(crossover, locations, distance_matrix, dist=dist)
+        improve = memetic_step(locations, distance_matrix, ls_candidate_k, ls_max_moves, dist=dist) if memetic else None
+        pop = initial_population(len(locations), population_size, distance_matrix)
+        if improve is not None:
+            pop = improve(pop, elite_size=0, stopping=stopping)
+        pop = rank_routes(pop, distance_matrix)
+        if events is not None:
+            events.evaluations(pop, 0)
+        progress = []
+
+        for i in range(num_generations):
+            pop = next_generation(i+1,pop,distance_matrix,mutation_rate,tournament_size,elite_size,crossover,improve,
+                                  stopping)
+            if events is not None:
+                events.evaluations(pop, i+1)
+            progress.append(pop[0].length)
+            if stopping is not None and stopping.update(pop[0].length, len(pop) - elite_size):
+                stopped_early = True
+                break
+            if num_islands > 1 and migration_size > 0 and (i + 1) % migration_interval == 0:
+                emigrants = [list(being.route) for being in pop[:migration_size]]
+                inboxes[(island_id + 1) % num_islands].put(emigrants)
+                immigrants = receive_immigrants(inboxes[island_id], stopping)
+                if immigrants is None:
+                    stopped_early = True
+                    break
+                for k, route in enumerate(immigrants):
+                    pop[-(k + 1)] = Being(route, [0, 0], 0, i+1)
+
+        # Immigrants of the last migration are not ranked yet
+        pop = rank_routes(pop, distance_matrix)
+        results.put((island_id, progress, list(pop[0].route), pop[0].length))
+    finally:
+        Being.set_lineage_log(None)
+        if events is not None:
+            events.close()
+        if stopped_early:
+            # Nobody reads the routes sent after the deadline; don't wait for them to be flushed
+            for inbox in inboxes:
+                inbox.cancel_join_thread()
+
+def GA_island_model(data_model = None, num_islands = None, population_size = 100, num_generations = 100,
+                    mutation_rate = 0.01, tournament_size = 3, elite_size = 3, migration_interval = 10,
+                    migration_size = 2, seed = None, crossover = "ox", memetic = False, ls_max_moves = 100,
+                    ls_candidate_k = 10, time_limit = None, event_log = None):
+    '''
+    Execute the GA as an island model: one population per process, with elite migration in a ring
 
-    pop = rank_routes(pop, distance_matrix)
-    best_route = (pop[0].route)
+    :param data_model: Data model created with create_data_model, defaults to None
+    :type data_model: dict, optional
+    :param num_islands: Number of populations/processes, defaults to the number of cores
+    :type num_islands: int, optional
+    :param population_size: Number of beings in each island, defaults to 100
+    :type population_size: int, optional
+    :param num_generations: Number of the generations to run each island, defaults to 100
+    :type num_generations: int, optional
+    :param mutation_rate: possibility of mutation, defaults to 0.01
+    :type mutation_rate: float, optional
+    :param tournament_size: Size of the tournament/number of elements selected to find the best to breed, defaults to 3
+    :type tournament_size: int, optional
+    :param elite_size: Elite size/elements that will be copied directly, defaults to 3
+    :type elite_size: int, optional
+    :param migration_interval: Generations between migrations, defaults to 10
+    :type migration_interval: int, optional
+    :param migration_size: Number of best beings sent to the next island on each migration, defaults to 2
+    :type migration_size: int, optional
+    :param seed: Base seed; island i uses seed + i. Defaults to None (random)
+    :type seed: int, optional
+    :param crossover: Crossover operator name, see breed_population, or "eax", defaults to "ox"
+    :type crossover: str, optional
+    :param memetic: Memetic mode in every island, see GA_implemented, defaults to False
+    :type memetic: bool, optional
+    :param ls_max_moves: Maximum improving moves of the local search per child, defaults to 100
+    :type ls_max_moves: int, optional
+    :param ls_candidate_k: Candidate list size of the local search, defaults to 10
+    :type ls_candidate_k: int, optional
+    :param time_limit: Wall-clock budget in seconds shared by every island (process start included), defaults to None
+    :type time_limit: float, optional
+    :param event_log: Base path of the event files; island i writes <event_log>.<i>, see GA_implemented. Defaults to None
+    :type event_log: str, optional
+    :return: tuple with the best distance of all islands for each generation, the best route and its distance
+    :rtype: tuple(list[float], list[int], float)
+    '''
+    if(data_model == None):
+        data_model = create_data_model()
+    if num_islands is None:
+        num_islands = os.cpu_count() or 1
+    if num_islands < 1:
+        raise ValueError("num_islands must be at least 1.")
+    validate_parameters(population_size, elite_size, crossover, memetic, ls_max_moves, ls_candidate_k)
+    if seed is None:
+        seed = random.randrange(2**31)
+    migration_interval = max(1, migration_interval)
+    migration_size = min(migration_size, population_size - elite_size)
+
+    locations = data_model["locations"]
+    deadline = time.time() + time_limit if time_limit is not None else None
+    inboxes = [multiprocessing.Queue() for _ in range(num_islands)]
+    results = multiprocessing.Queue()
+    islands = [
+        multiprocessing.Process(target=island_worker, kwargs=dict(
+            island_id=island_id, locations=locations, population_size=population_size,
+            num_generations=num_generations, mutation_rate=mutation_rate, tournament_size=tournament_size,
+            elite_size=elite_size, migration_interval=migration_interval, migration_size=migration_size,
+            inboxes=inboxes, results=results, seed=seed + island_id, crossover=crossover,
+            memetic=memetic, ls_max_moves=ls_max_moves, ls_candidate_k=ls_candidate_k, deadline=deadline,
+            event_log=event_log))
+        for island_id in range(num_islands)
+    ]
+    island_results = []
+    try:
+        for island in islands:
+            island.start()
+        # Results must be read before join, otherwise a full queue keeps the workers alive
+        while len(island_results) < num_islands:
+            try:
+                result = results.get(timeout=1.0)
+            except queue.Empty:
+                # A process killed before reporting (e.g. out of memory) never puts a result
+                reported = {island_id for island_id, *_ in island_results}
+                for island_id, island in enumerate(islands):
+                    if island_id not in reported and not island.is_alive() and island.exitcode != 0:
+                        raise RuntimeError(f"Island {island_id} exited with code {island.exitcode}")
+                continue
+            if result[1] is None:
+                raise RuntimeError(f"Island {result[0]} failed:\n{result[2]}")
+            island_results.append(result)
+        for island in islands:
+            island.join()
+    finally:
+        for island in islands:
+            if island.is_alive():
+                island.terminate()
+            if island.pid is not None:
+                island.join()
+
+    progress = [min(values) for values in zip(*(result[1] for result in island_results))]
+    _, _, best_route, best_distance = min(island_results, key=lambda result: result[3])
     best_route.append(best_route[0])
-    print("Final distance: " + str(1 / pop[0].fitness))
-    print(pop[0].get_info())
-    return (progress, best_route,  best_distance)
+    print(f"Final distance ({num_islands} islands): {best_distance}")
+    return (progress, best_route, best_distance)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,12 @@
 from tsp_utils.general import *
 from tsp_utils.mutation import *
+from tsp_utils.candidates import candidate_nearest_route, candidate_lists_from_matrix
+from tsp_utils.Tour import Tour
+from tsp_utils.stopping import StoppingCriteria, EXPIRY_CHECK_INTERVAL
+import numpy as np
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 #
 
@@ -11,17 +18,19 @@ def two_opt(route):
     return new_route
 
 # Nearest Neighbor Initialization: Generates a good initial solution
-def nearest_neighbor_init(distance_matrix):
+def nearest_neighbor_init(distance_matrix, candidates=None):
     num_cities = len(distance_matrix)
-    unvisited = list(range(num_cities))
-    current_city = random.choice(unvisited)
+    visited = np.zeros(num_cities, dtype=bool)
+    current_city = random.randrange(num_cities)
+    if candidates is not None:
+        return candidate_nearest_route(current_city, distance_matrix, candidates)
     route = [current_city]
-    unvisited.remove(current_city)
+    visited[current_city] = True
     
-    while unvisited:
-        nearest_city = min(unvisited, key=lambda city: distance_matrix[current_city][city])
+    for _ in range(num_cities - 1):
+        nearest_city = nearest_unvisited(distance_matrix[current_city], visited)
         route.append(nearest_city)
-        unvisited.remove(nearest_city)
+        visited[nearest_city] = True
         current_city = nearest_city
     
     return route
@@ -77,33 +86,135 @@ def neighbor(route , temperature, mutation_temp):
     neighbor_route = neighbor_func(route)
     return neighbor_route
 
+# Move based neighbors: a move is drawn first, its cost change is computed from the
+# touched edges only, and the route is modified just when the move is accepted
+def edges_length(route, positions, dist):
+    """Sum of the edges (route[k], route[k+1]) of a closed tour for the given positions k."""
+    num_cities = len(route)
+    return sum(dist[route[k]][route[(k + 1) % num_cities]] for k in positions)
+
+# The move functions draw from rng, the random module unless a random.Random instance is given
+def swap_move(route, rng=random):
+    num_cities = len(route)
+    city1 = rng.randint(0, num_cities - 1)
+    city2 = rng.randint(0, num_cities - 1)
+    return ("swap", city1, city2, None)
+
+def inversion_move(route, rng=random):
+    start, end = sorted([rng.randint(0, len(route)-1) for _ in range(2)])
+    return ("inversion", start, end, None)
+
+def scramble_move(route, rng=random):
+    start, end = sorted([rng.randint(0, len(route)-1) for _ in range(2)])
+    subset = route[start:end]
+    rng.shuffle(subset)
+    return ("scramble", start, end, subset)
+
+def move_delta(route, move, dist):
+    """
+    Cost change of applying a move to a closed tour, without modifying the route.
+    Swap and inversion touch at most four edges (O(1)); scramble touches its segment.
+    """
+    kind, start, end, subset = move
+    num_cities = len(route)
+    if kind == "swap":
+        if start == end:
+            return 0.0
+        positions = {(start - 1) % num_cities, start, (end - 1) % num_cities, end}
+        old_length = edges_length(route, positions, dist)
+        route[start], route[end] = route[end], route[start]
+        new_length = edges_length(route, positions, dist)
+        route[start], route[end] = route[end], route[start]
+        return new_length - old_length
+    if end - start < 2 or end - start >= num_cities:
+        return 0.0
+    before = route[start - 1]
+    after = route[end % num_cities]
+    if kind == "inversion":
+        first, last = route[start], route[end - 1]
+        return (dist[before][last] + dist[first][after]
+                - dist[before][first] - dist[last][after])
+    # scramble
+    old_length = edges_length(route, range(start - 1, end), dist)
+    new_length = dist[before][subset[0]] + dist[subset[-1]][after]
+    for k in range(len(subset) - 1):
+        new_length += dist[subset[k]][subset[k + 1]]
+    return new_length - old_length
+
+def apply_move(route, move):
+    """Applies a move drawn by swap_move, inversion_move or scramble_move in place (list or Tour)."""
+    kind, start, end, subset = move
+    if kind == "swap":
+        route[start], route[end] = route[end], route[start]
+    elif kind == "inversion":
+        if isinstance(route, Tour):
+            if end - start >= 2:
+                route.reverse(start, end - 1)
+        else:
+            route[start:end] = route[start:end][::-1]
+    else:
+        route[start:end] = subset
+    return route
+
+def neighbor_move(route, temperature, mutation_temp, rng=random):
+    """Same operator choice as neighbor(), returning a move instead of a modified route."""
+    move_functions = [
+                swap_move,
+                inversion_move,
+                scramble_move
+            ]
+    if(temperature <= mutation_temp ):
+        move_func = swap_move
+    else:
+        move_func = rng.choice(move_functions)
+    return move_func(route, rng)
+
 import random
-def create_route(num_cities):
+def create_route(num_cities, rng=random):
     '''
     Creates a random tour (route) of the cities.
 
     :param num_cities: number of cities to visit
     :type num_cities: int 
+    :param rng: Random number generator, defaults to the random module
+    :type rng: random.Random, optional
     :return: list with a random tour of the cities 
     :rtype: list[int]
     '''
     route = list(range(num_cities))
-    random.shuffle(route)
+    rng.shuffle(route)
     #first = route[0]
     #route.append(first)
     return route
 
 
 # Simulated Annealing with 2-opt and Nearest Neighbor Initialization
-def simulated_annealing(distance_matrix, initial_temperature, cooling_rate, min_temperature, restart_threshold, neighborhood_size = 100, initial_route = None, num_cities = 20, mutation_temp = 1000):
+def simulated_annealing(distance_matrix, initial_temperature, cooling_rate, min_temperature, restart_threshold, neighborhood_size = 100, initial_route = None, num_cities = 20, mutation_temp = 1000,
+                        drift_check_interval = 50, candidates = None, stop_event = None, stopping = None, dist = None,
+                        candidate_k = None):
+    # Optional shared stopping rules (tsp_utils.stopping.StoppingCriteria), checked once per temperature step,
+    # with the deadline also checked inside the neighborhood loop; stopping.reason is "min_temperature"
+    # when the schedule ran to the end. A chain that reaches stopping's target sets stop_event, so the other
+    # chains of a multi-start run stop at their next temperature step
+    if stopping is not None:
+        stopping.start()
     # Initialize with the Nearest Neighbor solution
     current_solution = []
     if (initial_route != None):
         current_solution = initial_route
     else:
         #current_solution = create_route(num_cities)
-        current_solution = nearest_neighbor_init(distance_matrix)
+        # Only the matrix is known here, so candidate lists are taken from it when candidate_k is set
+        if candidates is None and candidate_k:
+            candidates = candidate_lists_from_matrix(distance_matrix, candidate_k)
+        current_solution = nearest_neighbor_init(distance_matrix, candidates)
+    # Moves are applied in place; inversions flip the shorter side of the tour
+    current_solution = Tour(current_solution)
     current_distance = route_distance(current_solution,distance_matrix)
+    # Scalar lookups in the inner loop are much faster on nested lists than on the array;
+    # callers that already have the nested list view can pass it as dist
+    if dist is None:
+        dist = as_nested_list(distance_matrix)
 
     # Best solution found
     best_solution = current_solution[:]
@@ -115,18 +226,28 @@ def simulated_annealing(distance_matrix, initial_temperature, cooling_rate, min_
     no_improvement_iterations = 0  # Counter to track how long we've gone without improvement
 
     while temperature > min_temperature:
+        # Another chain of a multi-start run may have already reached the target
+        if stop_event is not None and stop_event.is_set():
+            if stopping is not None:
+                stopping.finish("stop_event")
+            break
         # Generate a neighboring solution using 2-opt move
+        moves = 0
         for j in range(neighborhood_size):
-            new_solution = neighbor(current_solution, temperature, mutation_temp)
-            new_distance = route_distance(new_solution,distance_matrix)
+            # A long neighborhood must not overrun the time limit before the next update()
+            if stopping is not None and j and j % EXPIRY_CHECK_INTERVAL == 0 and stopping.expired():
+                break
+            moves += 1
+            # Moves are drawn and evaluated on the raw order array (fast reads), applied through the Tour
+            move = neighbor_move(current_solution.order, temperature, mutation_temp)
 
-            # Calculate the change in distance
-            delta_distance = new_distance - current_distance
+            # Calculate the change in distance from the edges touched by the move
+            delta_distance = move_delta(current_solution.order, move, dist)
 
             # Accept the new solution if it's better or based on a probability depending on temperature
             if delta_distance < 0 or random.random() < math.exp(-delta_distance / temperature):
-                current_solution = new_solution
-                current_distance = new_distance
+                apply_move(current_solution, move)
+                current_distance += delta_distance
                 improvement_count += 1
                 no_improvement_iterations = 0  # Reset improvement counter if an improvement is found
 
@@ -141,16 +262,274 @@ def simulated_annealing(distance_matrix, initial_temperature, cooling_rate, min_
         temperature = adaptive_cooling_schedule(temperature, improvement_count)
         iteration += 1
 
+        # Periodically recompute the full distance so float drift of the deltas can't build up
+        if drift_check_interval and iteration % drift_check_interval == 0:
+            current_distance = route_distance(current_solution,distance_matrix)
+
         # If stuck for too long, restart the search
         if no_improvement_iterations > restart_threshold:
-            current_solution = restart_solution(current_solution)
+            current_solution = Tour(restart_solution(current_solution))
             current_distance = route_distance(current_solution,distance_matrix)
             no_improvement_iterations = 0  # Reset the counter after restarting
 
+        if stopping is not None and stopping.update(best_distance, moves):
+            if stopping.reason == "target" and stop_event is not None:
+                stop_event.set()
+            break
+
+    if stopping is not None:
+        stopping.finish("min_temperature")
     best_solution.append(best_solution[0])
     return best_solution, best_distance
 
 
+# Multi-start executor: independent chains in a process pool, stopped together on target
+_chain_stop_event = None
+
+def init_chain_worker(stop_event):
+    """Pool initializer; keeps the shared stop event where annealing_chain can reach it."""
+    global _chain_stop_event
+    _chain_stop_event = stop_event
+
+def skipped_chain(chain_id, seed):
+    """Statistics of a chain that never ran because the target was reached first."""
+    return {"chain": chain_id, "seed": seed, "route": None, "distance": float("inf"),
+            "time": 0.0, "skipped": True}
+
+def annealing_chain(chain_id, seed, distance_matrix, target_distance, sa_kwargs):
+    """
+    Runs one seeded simulated_annealing chain and returns its statistics. The target is checked at
+    every temperature step, so the chain that reaches it stops right away and stops the others.
+    """
+    if _chain_stop_event is not None and _chain_stop_event.is_set():
+        return skipped_chain(chain_id, seed)
+    random.seed(seed)
+    np.random.seed(seed % (2**32))
+    sa_kwargs = dict(sa_kwargs)
+    if target_distance is not None:
+        # Each process works on its own copy of the criteria, so setting the target here is local
+        stopping = sa_kwargs.get("stopping") or StoppingCriteria()
+        stopping.target_length = target_distance
+        sa_kwargs["stopping"] = stopping
+    start = time.perf_counter()
+    route, distance = simulated_annealing(distance_matrix, stop_event=_chain_stop_event, **sa_kwargs)
+    return {"chain": chain_id, "seed": seed, "route": route, "distance": distance,
+            "time": time.perf_counter() - start, "skipped": False}
+
+def multi_start_annealing(distance_matrix, num_chains = 4, target_distance = None, max_workers = None, seed = None, **sa_kwargs):
+    """
+    Runs independent simulated_annealing chains with distinct seeds in a process pool.
+    As soon as one chain reaches target_distance (checked at every temperature step) every
+    running chain stops at its next temperature step and chains not started yet are skipped;
+    their statistics have "skipped" set to True.
+
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param num_chains: Number of chains (starts), defaults to 4
+    :type num_chains: int, optional
+    :param target_distance: Stop all chains once one reaches this distance, defaults to None
+    :type target_distance: float, optional
+    :param max_workers: Number of processes, defaults to the number of cores
+    :type max_workers: int, optional
+    :param seed: Base seed; chain i uses seed + i. Defaults to None (random)
+    :type seed: int, optional
+    :param sa_kwargs: Remaining simulated_annealing parameters (initial_temperature, cooling_rate, ...)
+    :return: best route (closed), its distance and a list with the statistics of each chain
+    :rtype: tuple(list[int], float, list[dict])
+    """
+    if seed is None:
+        seed = random.randrange(2**31)
+    stop_event = multiprocessing.Event()
+    chain_stats = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_chain_worker,
+                             initargs=(stop_event,)) as executor:
+        futures = {executor.submit(annealing_chain, chain_id, seed + chain_id, distance_matrix,
+                                   target_distance, sa_kwargs): chain_id
+                   for chain_id in range(num_chains)}
+        for future in as_completed(futures):
+            if future.cancelled():
+                chain_id = futures[future]
+                chain_stats.append(skipped_chain(chain_id, seed + chain_id))
+                continue
+            chain_stats.append(future.result())
+            if stop_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+    chain_stats.sort(key=lambda stats: stats["chain"])
+    best = min(chain_stats, key=lambda stats: stats["distance"])
+    return best["route"], best["distance"], chain_stats
+
+
+# Parallel tempering (replica exchange): M replicas at a fixed temperature ladder. Swapping the
+# temperatures of two replicas is equivalent to swapping their states and avoids moving routes.
+def anneal_sweep(replica, dist, temperature, sweep_size, mutation_temp, rng=random):
+    """
+    Runs sweep_size Metropolis moves on a replica dict (route, distance, best_route, best_distance),
+    drawing moves and acceptances from rng.
+    """
+    route = replica["route"]
+    current_distance = replica["distance"]
+    for _ in range(sweep_size):
+        move = neighbor_move(route, temperature, mutation_temp, rng)
+        delta_distance = move_delta(route, move, dist)
+        if delta_distance < 0 or rng.random() < math.exp(-delta_distance / temperature):
+            apply_move(route, move)
+            current_distance += delta_distance
+            if current_distance < replica["best_distance"]:
+                replica["best_route"] = route[:]
+                replica["best_distance"] = current_distance
+    replica["distance"] = current_distance
+    return replica
+
+def new_replica(distance_matrix, initial_route = None, rng=random):
+    route = list(initial_route) if initial_route is not None else create_route(len(distance_matrix), rng)
+    distance = route_distance(route, distance_matrix)
+    return {"route": route, "distance": distance, "best_route": route[:], "best_distance": distance}
+
+def replica_worker(conn, distance_matrix, initial_route, mutation_temp, seed):
+    """Process holding one replica; serves sweep/best/stop commands received through a pipe."""
+    rng = random.Random(seed)
+    dist = as_nested_list(distance_matrix)
+    replica = new_replica(distance_matrix, initial_route, rng)
+    while True:
+        command, argument = conn.recv()
+        if command == "sweep":
+            temperature, sweep_size = argument
+            anneal_sweep(replica, dist, temperature, sweep_size, mutation_temp, rng)
+            replica["distance"] = route_distance(replica["route"], distance_matrix)
+            conn.send(replica["distance"])
+        elif command == "best":
+            conn.send((replica["best_route"], replica["best_distance"]))
+        else:
+            conn.close()
+            return
+
+def temperature_ladder(min_temperature, max_temperature, num_replicas):
+    """Geometric ladder of temperatures from min_temperature to max_temperature."""
+    if num_replicas == 1:
+        return [float(min_temperature)]
+    ratio = (max_temperature / min_temperature) ** (1 / (num_replicas - 1))
+    return [min_temperature * ratio**k for k in range(num_replicas)]
+
+def parallel_tempering(distance_matrix, num_replicas = 8, min_temperature = 1, max_temperature = 1000,
+                       num_sweeps = 200, sweep_size = 100, initial_route = None, mutation_temp = 0,
+                       parallel = False, seed = None, stopping = None):
+    """
+    Replica exchange simulated annealing. Each replica runs sweep_size neighbor moves at its own
+    temperature of the ladder, then neighboring temperatures try to swap states with the
+    Metropolis criterion min(1, exp((1/T_i - 1/T_j) * (E_i - E_j))).
+
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param num_replicas: Number of replicas/temperatures, defaults to 8
+    :type num_replicas: int, optional
+    :param min_temperature: Lowest temperature of the ladder, defaults to 1
+    :type min_temperature: float, optional
+    :param max_temperature: Highest temperature of the ladder, defaults to 1000
+    :type max_temperature: float, optional
+    :param num_sweeps: Number of sweep + exchange rounds, defaults to 200
+    :type num_sweeps: int, optional
+    :param sweep_size: Neighbor moves per replica between exchanges, defaults to 100
+    :type sweep_size: int, optional
+    :param initial_route: Starting route of every replica, defaults to random routes
+    :type initial_route: list[int], optional
+    :param mutation_temp: Below this temperature only swap moves are used, defaults to 0
+    :type mutation_temp: float, optional
+    :param parallel: Run each replica in its own process, defaults to False
+    :type parallel: bool, optional
+    :param seed: Base seed, defaults to None (random)
+    :type seed: int, optional
+    :param stopping: Stopping rules checked after every sweep, reason "num_sweeps" when none fired, defaults to None
+    :type stopping: tsp_utils.stopping.StoppingCriteria, optional
+    :return: best route found (closed), its distance and the exchange statistics
+             ({"attempted": ..., "accepted": ...} swaps between neighboring temperatures)
+    :rtype: tuple(list[int], float, dict)
+    """
+    if stopping is not None:
+        stopping.start()
+    if seed is None:
+        seed = random.randrange(2**31)
+    # Exchanges draw from rng, serial replicas from replica_rng; the global random state is untouched
+    rng = random.Random(seed)
+    temperatures = temperature_ladder(min_temperature, max_temperature, num_replicas)
+    # at_temperature[k] is the replica currently running at temperatures[k]
+    at_temperature = list(range(num_replicas))
+
+    connections = []
+    workers = []
+    try:
+        if parallel:
+            for replica_id in range(num_replicas):
+                parent_conn, child_conn = multiprocessing.Pipe()
+                worker = multiprocessing.Process(target=replica_worker, args=(
+                    child_conn, distance_matrix, initial_route, mutation_temp, seed + replica_id + 1))
+                worker.start()
+                connections.append(parent_conn)
+                workers.append(worker)
+        else:
+            replica_rng = random.Random(seed + 1)
+            dist = as_nested_list(distance_matrix)
+            replicas = [new_replica(distance_matrix, initial_route, replica_rng) for _ in range(num_replicas)]
+
+        energies = [0.0] * num_replicas
+        best_energy = math.inf
+        exchanges = {"attempted": 0, "accepted": 0}
+        for sweep in range(num_sweeps):
+            if parallel:
+                for k, replica_id in enumerate(at_temperature):
+                    connections[replica_id].send(("sweep", (temperatures[k], sweep_size)))
+                for replica_id in range(num_replicas):
+                    energies[replica_id] = connections[replica_id].recv()
+            else:
+                for k, replica_id in enumerate(at_temperature):
+                    replica = anneal_sweep(replicas[replica_id], dist, temperatures[k], sweep_size, mutation_temp,
+                                           replica_rng)
+                    replica["distance"] = route_distance(replica["route"], distance_matrix)
+                    energies[replica_id] = replica["distance"]
+
+            # Exchange between neighboring temperatures, alternating even and odd pairs
+            for k in range(sweep % 2, num_replicas - 1, 2):
+                cold, hot = at_temperature[k], at_temperature[k + 1]
+                exponent = (1 / temperatures[k] - 1 / temperatures[k + 1]) * (energies[cold] - energies[hot])
+                exchanges["attempted"] += 1
+                if exponent >= 0 or rng.random() < math.exp(exponent):
+                    at_temperature[k], at_temperature[k + 1] = hot, cold
+                    exchanges["accepted"] += 1
+
+            # Replicas keep their own best tours; the lowest energy seen drives the stopping rules
+            best_energy = min(best_energy, min(energies))
+            if stopping is not None and stopping.update(best_energy, num_replicas * sweep_size):
+                break
+
+        if parallel:
+            results = []
+            for conn in connections:
+                conn.send(("best", None))
+                results.append(conn.recv())
+        else:
+            results = [(replica["best_route"], replica["best_distance"]) for replica in replicas]
+    finally:
+        # Replicas are stopped and joined even when a sweep fails or the run is interrupted
+        for conn in connections:
+            try:
+                conn.send(("stop", None))
+            except OSError:
+                pass
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    best_solution, _ = min(results, key=lambda result: result[1])
+    best_solution = list(best_solution)
+    best_distance = route_distance(best_solution, distance_matrix)
+    best_solution.append(best_solution[0])
+    if stopping is not None:
+        stopping.finish("num_sweeps")
+    return best_solution, best_distance, exchanges
+
+
 if __name__ == "__main__":
     points = generate_random_points(20)
     data_model = create_data_model(points)
@@ -1,4 +1,5 @@
 from tsp_utils.general import *
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 
@@ -55,7 +56,7 @@ def print_solution(manager, routing, solution):
     plan_output += f" {manager.IndexToNode(index)}\n"
     print(plan_output)
 
-def benchmark(locations=None, points_num=4, shape='square'):
+def benchmark(locations=None, points_num=4, shape='square', time_limit=2, distance_matrix=None):
     '''
     Solves the problem using the Tabu Search algorithm in Google OR-Tools.
 
@@ -65,6 +66,10 @@ def benchmark(locations=None, points_num=4, shape='square'):
     :type points_num: int, optional
     :param shape: String defining the shape to be generated, defaults to square
     :type shape: str, optional
+    :param time_limit: Search time limit in seconds, defaults to 2
+    :type time_limit: float, optional
+    :param distance_matrix: Precomputed distance matrix of the locations, defaults to None (computed here)
+    :type distance_matrix: numpy.ndarray, optional
     :return: solution found, else None
     :rtype: (RoutingIndexManager, RoutingModel, Assignment, data_model_model) objects from Google OR-Tools and custom data_model_model
     '''
@@ -83,15 +88,11 @@ def benchmark(locations=None, points_num=4, shape='square'):
     routing = pywrapcp.RoutingModel(manager)
 
     # Compute the distance matrix.
-    float_distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
+    float_distance_matrix = distance_matrix
+    if float_distance_matrix is None:
+        float_distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
     # Scale up the distance matrix to integers.
-    scaled_distance_matrix = {
-        from_node: {
-            to_node: int(distance * 10000)
-            for to_node, distance in row.items()
-        }
-        for from_node, row in float_distance_matrix.items()
-    }
+    scaled_distance_matrix = (float_distance_matrix * 10000).astype(np.int64).tolist()
 
     def distance_callback(from_index, to_index):
         """Returns the scaled distance between the two nodes."""
@@ -110,7 +111,7 @@ def benchmark(locations=None, points_num=4, shape='square'):
     search_parameters.local_search_metaheuristic = (
         routing_enums_pb2.LocalSearchMetaheuristic.TABU_SEARCH
     )
-    search_parameters.time_limit.seconds = 2 # time limit for the search.
+    search_parameters.time_limit.FromMilliseconds(int(time_limit * 1000)) # time limit for the search.
 
     # Solve the problem.
     solution = routing.SolveWithParameters(search_parameters)
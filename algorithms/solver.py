@@ -0,0 +1,216 @@
+from tsp_utils.general import *
+from tsp_utils.candidates import shared_candidate_lists
+from tsp_utils.stopping import StoppingCriteria
+from algorithms.GA_implemented import GA_implemented
+from algorithms.AC_implemented import ant_colony, MMAS_RHO
+from algorithms.SA_implemented import simulated_annealing, parallel_tempering
+from algorithms.TS_implemented import tabu_search
+import time
+
+# Single entry point for every solver: solve(problem, engine=..., budget=...) builds the distance
+# structures once in a Problem and returns a SolveResult with the same shape for every engine.
+
+# Candidate list size shared by the engines unless an engine option asks for more neighbors
+CANDIDATE_K = 10
+
+class Problem:
+    """
+    TSP instance with the distance structures shared by the engines. The matrix is computed once
+    when the problem is created; the nested list view and the candidate lists on first use. The
+    engines slice the candidate lists they need from the widest ones built so far.
+    """
+
+    def __init__(self, locations):
+        """
+        Initializes a new Problem instance.
+
+        :param locations: List of points as (x, y) or (x, y, z) tuples (list[tuple])
+        """
+        self.data_model = create_data_model(locations)
+        self.locations = self.data_model["locations"]
+        self.distance_matrix = compute_euclidean_distance_matrix(self.locations)
+        self._dist = None
+        self._candidates = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    @property
+    def dist(self):
+        """Nested list view of the distance matrix (as_nested_list)."""
+        if self._dist is None:
+            self._dist = as_nested_list(self.distance_matrix)
+        return self._dist
+
+    def candidates(self, k=CANDIDATE_K):
+        """Candidate lists with the k nearest cities of every city, rebuilt only when wider lists are needed."""
+        candidates = shared_candidate_lists(self.locations, k, self._candidates)
+        if self._candidates is None or candidates.shape[1] > self._candidates.shape[1]:
+            self._candidates = candidates
+        return candidates
+
+def as_problem(problem):
+    '''
+    Accepts a Problem, a data model created with create_data_model or a list of locations.
+
+    :rtype: Problem
+    '''
+    if isinstance(problem, Problem):
+        return problem
+    if isinstance(problem, dict):
+        return Problem(problem["locations"])
+    return Problem(problem)
+
+class SolveResult:
+    """
+    Result of one engine run, with the same fields for every engine.
+
+    tour is the route without the closing city, length its closed tour length, trace the
+    convergence as (seconds, evaluations, best length) at every improvement, time the wall-clock
+    time of the engine (distance structures excluded) and stop_reason the criterion that ended it.
+    """
+
+    def __init__(self, engine, tour, length, trace, time, stop_reason):
+        self.engine = engine
+        self.tour = tour
+        self.length = length
+        self.trace = trace
+        self.time = time
+        self.stop_reason = stop_reason
+
+    def closed_tour(self):
+        """Tour with the first city repeated at the end, as the plotting helpers expect."""
+        return self.tour + self.tour[:1]
+
+    def __repr__(self):
+        return (f"SolveResult(engine={self.engine!r}, length={self.length:.2f}, time={self.time:.3f}, "
+                f"stop_reason={self.stop_reason!r})")
+
+def open_route(route):
+    route = [int(city) for city in route]
+    if len(route) > 1 and route[0] == route[-1]:
+        route = route[:-1]
+    return route
+
+def candidate_width(options, *keys):
+    """Candidate list size that covers every candidate_k style option of an engine."""
+    return max([CANDIDATE_K] + [options[key] for key in keys if options.get(key)])
+
+# Engine runners: (problem, stopping, options) -> route. Every runner passes the shared matrix, and
+# the nested list view and candidate lists when the engine configuration uses them.
+def run_ga(problem, stopping, options):
+    options = {"num_generations": 500, **options}
+    if options.get("memetic") or options.get("crossover") == "eax":
+        options = {"dist": problem.dist, "candidates": problem.candidates(candidate_width(options, "ls_candidate_k")),
+                   **options}
+    return GA_implemented(problem.data_model, stopping=stopping, distance_matrix=problem.distance_matrix, **options)[1]
+
+def run_aco(problem, stopping, options):
+    rho = MMAS_RHO if options.get("variant") == "MMAS" else 0.2
+    options = {"alpha": 1.5, "beta": 3, "rho": rho, "q_constant": 25000, "generations": 350, **options}
+    if options.get("local_search_mode") is not None:
+        options = {"dist": problem.dist, **options}
+    if options.get("local_search_mode") is not None or options.get("candidate_k"):
+        options = {"candidates": problem.candidates(candidate_width(options, "candidate_k", "ls_candidate_k")),
+                   **options}
+    return ant_colony(problem.data_model, stopping=stopping, distance_matrix=problem.distance_matrix, **options)[0]
+
+def run_sa(problem, stopping, options):
+    options = {"initial_temperature": 10000000, "cooling_rate": 1, "min_temperature": 1, "restart_threshold": 20,
+               "dist": problem.dist, **options}
+    if options.get("candidate_k"):
+        options = {"candidates": problem.candidates(options["candidate_k"]), **options}
+    return simulated_annealing(problem.distance_matrix, stopping=stopping, **options)[0]
+
+def run_sa_pt(problem, stopping, options):
+    options = {"num_sweeps": 2000, **options}
+    return parallel_tempering(problem.distance_matrix, stopping=stopping, **options)[0]
+
+def run_ts(problem, stopping, options):
+    # The greedy start on the candidate lists is the full greedy route, found without full row scans
+    options = {"max_iter": 1000, "neighborhood_mode": "2opt",
+               "candidates": problem.candidates(candidate_width(options, "candidate_k")), **options}
+    return tabu_search(problem.data_model, stopping=stopping, distance_matrix=problem.distance_matrix, **options)[1]
+
+def run_ortools(problem, stopping, options):
+    # OR-Tools is only needed for this engine
+    from algorithms.benchmark import benchmark, find_route
+    stopping.start()
+    time_limit = stopping.time_limit if stopping.time_limit is not None else 2
+    solution = benchmark(problem.locations, time_limit=time_limit, distance_matrix=problem.distance_matrix, **options)
+    if solution is None:
+        raise RuntimeError("OR-Tools found no solution.")
+    route = find_route(solution[1], solution[2])
+    stopping.update(tour_length(route, problem.distance_matrix))
+    stopping.finish("time_limit")
+    return route
+
+ENGINES = {
+    "ga": run_ga,
+    "aco": run_aco,
+    "sa": run_sa,
+    "sa_pt": run_sa_pt,
+    "ts": run_ts,
+    "ortools": run_ortools,
+}
+
+def as_stopping(budget):
+    '''
+    Stopping rules of one run: None (the engine's own limits), a time limit in seconds or a
+    StoppingCriteria, whose parameters are used for a new instance so the same budget can be given
+    to several runs without sharing counters or traces.
+
+    :rtype: StoppingCriteria
+    '''
+    if budget is None:
+        return StoppingCriteria()
+    if isinstance(budget, StoppingCriteria):
+        return StoppingCriteria(time_limit=budget.time_limit, target_length=budget.target_length,
+                                target_gap=budget.target_gap, stagnation=budget.stagnation,
+                                max_evaluations=budget.max_evaluations)
+    return StoppingCriteria(time_limit=float(budget))
+
+def solve(problem, engine="ga", budget=None, **options):
+    '''
+    Solves a TSP instance with one of the engines in ENGINES.
+
+    :param problem: Problem, data model created with create_data_model or list of locations
+    :type problem: Problem | dict | list[tuple]
+    :param engine: Engine name ("ga", "aco", "sa", "sa_pt", "ts" or "ortools"), defaults to "ga"
+    :type engine: str, optional
+    :param budget: Time limit in seconds or StoppingCriteria, defaults to None (the engine's own limits)
+    :type budget: float | StoppingCriteria, optional
+    :param options: Extra parameters of the engine function (e.g. memetic=True for "ga")
+    :raises ValueError: Unknown engine
+    :return: tour, length, convergence trace and timing of the run
+    :rtype: SolveResult
+    '''
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    problem = as_problem(problem)
+    stopping = as_stopping(budget)
+    start = time.perf_counter()
+    route = open_route(ENGINES[engine](problem, stopping, options))
+    elapsed = time.perf_counter() - start
+    return SolveResult(engine, route, tour_length(route, problem.distance_matrix), stopping.trace, elapsed,
+                       stopping.reason)
+
+def solve_portfolio(problem, engines=("ga", "aco", "sa", "ts"), budget=None, options=None):
+    '''
+    Runs several engines on the same Problem, so the distance structures are built only once.
+
+    :param problem: Problem, data model created with create_data_model or list of locations
+    :type problem: Problem | dict | list[tuple]
+    :param engines: Engine names, defaults to ("ga", "aco", "sa", "ts")
+    :type engines: tuple(str), optional
+    :param budget: Budget of each run, see solve, defaults to None
+    :type budget: float | StoppingCriteria, optional
+    :param options: Extra parameters per engine name, defaults to None
+    :type options: dict[str, dict], optional
+    :return: results sorted by length, the best first
+    :rtype: list[SolveResult]
+    '''
+    problem = as_problem(problem)
+    options = options or {}
+    results = [solve(problem, engine, budget, **options.get(engine, {})) for engine in engines]
+    return sorted(results, key=lambda result: result.length)
@@ -4,7 +4,7 @@ from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 import numpy as np
 import dash_bootstrap_components as dbc  
-from algorithms.SA_implemented import simulated_annealing
+from algorithms.SA_implemented import multi_start_annealing
 from algorithms.benchmark import benchmark, find_route
 from tsp_utils.general import *
 import base64
@@ -516,27 +516,21 @@ def update_plots(n_clicks, selected_option, uploaded_data, num_cities, initial_t
     print(str1)
     print("Route Benchmark:\n\t",end = "")
     print_route(route_bench)
-    distance = 2*benchmark_dist
-    tries = 0 
     print("################# Custom Simulated Annealing Solution #################")
-    SA_best_solution_distance = distance
-    SA_best_solution = None
-    SA_best_route = None
-    while (distance > benchmark_dist) and (tries < max_tries):
-        solution_SA = simulated_annealing(distance_matrix = distance_matrix, initial_temperature=initial_temperature, 
-                                          cooling_rate=cooling_rate,restart_threshold=restart_threshold,min_temperature = min_temperature,
-                                          neighborhood_size=neighborhood_size)
-        distance = solution_SA[1]
-        str2 = f"Distance: {solution_SA[1]:5.0f} m"
-        print(str2)
-        route_SA = solution_SA[0]
-        print("Route SA:\n\t",end = "")
-        print_route(route_SA)
-        if(distance < SA_best_solution_distance):
-            SA_best_solution_distance = distance
-            SA_best_solution = solution_SA
-            SA_best_route = route_SA
-        tries+=1
+    # Up to max_tries independent chains run in parallel; all stop once one matches the benchmark
+    SA_best_route, SA_best_solution_distance, chain_stats = multi_start_annealing(
+        distance_matrix, num_chains=max_tries, target_distance=benchmark_dist,
+        initial_temperature=initial_temperature, cooling_rate=cooling_rate,
+        restart_threshold=restart_threshold, min_temperature=min_temperature,
+        neighborhood_size=neighborhood_size)
+    for stats in chain_stats:
+        if not stats["skipped"]:
+            print(f"Chain {stats['chain']}: {stats['distance']:5.0f} m")
+    SA_best_solution = (SA_best_route, SA_best_solution_distance)
+    str2 = f"Distance: {SA_best_solution_distance:5.0f} m"
+    print(str2)
+    print("Route SA:\n\t",end = "")
+    print_route(SA_best_route)
     
     locations = data_model["locations"]
     x_coords, y_coords = zip(*locations)
@@ -1,6 +1,7 @@
-from algorithms.AC_implemented import ant_colony
+from algorithms.AC_implemented import ant_colony, MMAS_RHO
 from algorithms.benchmark import benchmark, print_solution , find_route
 from tsp_utils.general import *
+from tsp_utils.stopping import StoppingCriteria
 import argparse  
 
 #TODO 
@@ -19,12 +20,17 @@ if __name__ == "__main__":
     parser.add_argument('--num_generations', type=int, default=350, help='Number of generations')
     parser.add_argument('--alpha', type=float, default=1.5, help='Alpha value')
     parser.add_argument('--beta', type=float, default=3, help='Beta value')
-    parser.add_argument('--rho', type=float, default=0.2, help='Rho value')
+    parser.add_argument('--rho', type=float, default=None, help='Rho value (default: 0.2 for AS, MMAS_RHO for MMAS)')
     parser.add_argument('--q_constant', type=int, default=25000, help='Q value')
     parser.add_argument('--shape', choices=['square', 'circle', 'hexagon', 'triangle'], 
                         default='square', help='Shape type (square, circle, hexagon, triangle)')
     parser.add_argument('--random', action='store_true', help='Enable random behavior (default is disabled)')
     parser.add_argument('--file', type=str, help='Path to the file to open')
+    parser.add_argument('--batch', action='store_true', help='Build all ants of a generation together with NumPy')
+    parser.add_argument('--variant', choices=['AS', 'MMAS'], default='AS', help='Ant System or MAX-MIN Ant System')
+    parser.add_argument('--local_search', choices=['all', 'best'], default=None, help='2-opt/Or-opt on every ant or on the iteration-best ant')
+    parser.add_argument('--time_limit', type=float, default=None, help='Wall-clock limit in seconds for the custom solver')
+    parser.add_argument('--benchmark_time', type=float, default=2, help='Time limit in seconds of the OR-Tools benchmark')
     
 
     # Parse the arguments
@@ -42,7 +48,9 @@ if __name__ == "__main__":
 
     
     print("################# Custom AC Solution #################")
-    AC_solution = ant_colony(data_model, alpha = args.alpha, beta = args.beta, rho = args.rho, q_constant = args.q_constant, generations = args.num_generations)
+    rho = args.rho if args.rho is not None else (0.2 if args.variant == "AS" else MMAS_RHO)
+    AC_solution = ant_colony(data_model, alpha = args.alpha, beta = args.beta, rho = rho, q_constant = args.q_constant, generations = args.num_generations, batch = args.batch, variant = args.variant, local_search_mode = args.local_search,
+                             stopping = StoppingCriteria(time_limit = args.time_limit))
     AC_best_route = AC_solution[0]
     AC_best_solution_distance = AC_solution[1]
     print(f"Distance: {AC_best_solution_distance:.2f}  m\n")
@@ -50,7 +58,7 @@ if __name__ == "__main__":
     plot_locations_with_connections(data_model["locations"], AC_best_route, f"Solution found using AC: {AC_best_solution_distance:.3f} m")
 
     print("################# Benchmark Solution #################")
-    solution_benchmark = benchmark(data_model["locations"])
+    solution_benchmark = benchmark(data_model["locations"], time_limit=args.benchmark_time)
     route_bench = find_route(solution_benchmark[1], solution_benchmark[2])
     distance_matrix = compute_euclidean_distance_matrix(data_model["locations"])
     benchmark_dist = calculate_route_distance(distance_matrix, route_bench)
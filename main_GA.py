@@ -1,6 +1,7 @@
-from algorithms.GA_implemented import GA_implemented
+from algorithms.GA_implemented import GA_implemented, GA_island_model
 from algorithms.benchmark import benchmark, print_solution , find_route
 from tsp_utils.general import *
+from tsp_utils.stopping import StoppingCriteria
 import argparse  
 
 #TODO 
@@ -25,6 +26,13 @@ if __name__ == "__main__":
                         default='square', help='Shape type (square, circle, hexagon, triangle)')
     parser.add_argument('--random', action='store_true', help='Enable random behavior (default is disabled)')
     parser.add_argument('--file', type=str, help='Path to the file to open')
+    parser.add_argument('--islands', type=int, default=1, help='Number of GA islands, one process each (1 runs a single population)')
+    parser.add_argument('--crossover', choices=['ox', 'pmx', 'cx', 'erx', 'batch_ox', 'eax'], default='ox',
+                        help='Crossover operator (eax = Edge Assembly Crossover)')
+    parser.add_argument('--memetic', action='store_true', help='Improve every child with 2-opt/Or-opt local search')
+    parser.add_argument('--time_limit', type=float, default=None, help='Wall-clock limit in seconds for the custom solver')
+    parser.add_argument('--benchmark_time', type=float, default=2, help='Time limit in seconds of the OR-Tools benchmark')
+    parser.add_argument('--event_log', type=str, help='Write the genealogy event stream of the run to this file (one <file>.<island> per island with --islands)')
     
 
     # Parse the arguments
@@ -40,13 +48,20 @@ if __name__ == "__main__":
     data_model = create_data_model(cities)
     
     print("################# Benchmark Solution #################")
-    solution_benchmark = benchmark(data_model["locations"])
+    solution_benchmark = benchmark(data_model["locations"], time_limit=args.benchmark_time)
     print_solution(solution_benchmark[0], solution_benchmark[1], solution_benchmark[2])
     route = find_route(solution_benchmark[1], solution_benchmark[2])
     plot_locations_with_connections(solution_benchmark[3]["locations"], route, "Solution found using benchmark")
     
     print("################# Custom GA Solution #################")
-    solution_GA = GA_implemented(data_model,num_generations=500)
+    if args.islands > 1:
+        solution_GA = GA_island_model(data_model, num_islands=args.islands, num_generations=500,
+                                      crossover=args.crossover, memetic=args.memetic, time_limit=args.time_limit,
+                                      event_log=args.event_log)
+    else:
+        solution_GA = GA_implemented(data_model,num_generations=500,crossover=args.crossover,
+                                     memetic=args.memetic, event_log=args.event_log,
+                                     stopping=StoppingCriteria(time_limit=args.time_limit))
     print(f"Distance: {solution_GA[2]:.2f}  m\n")
     print_route(solution_GA[1])
     plot_locations_with_connections(data_model["locations"], solution_GA[1], "Solution found using custom GA")
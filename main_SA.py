@@ -1,6 +1,7 @@
-from algorithms.SA_implemented import simulated_annealing
+from algorithms.SA_implemented import simulated_annealing, multi_start_annealing, parallel_tempering
 from algorithms.benchmark import benchmark, print_solution , find_route
 from tsp_utils.general import *
+from tsp_utils.stopping import StoppingCriteria
 import argparse  
 
 #TODO 
@@ -25,6 +26,11 @@ if __name__ == "__main__":
                         default='square', help='Shape type (square, circle, hexagon, triangle)')
     parser.add_argument('--random', action='store_true', help='Enable random behavior (default is disabled)')
     parser.add_argument('--file', type=str, help='Path to the file to open')
+    parser.add_argument('--chains', type=int, default=1, help='Number of independent SA chains run in parallel (1 runs a single chain)')
+    parser.add_argument('--tempering', type=int, default=0, help='Number of replicas of a parallel tempering (replica exchange) run (0 runs plain SA)')
+    parser.add_argument('--candidate_k', type=int, default=None, help='Nearest neighbors per city for the initial tour (default: full scan)')
+    parser.add_argument('--time_limit', type=float, default=None, help='Wall-clock limit in seconds for the custom solver')
+    parser.add_argument('--benchmark_time', type=float, default=2, help='Time limit in seconds of the OR-Tools benchmark')
     
 
     # Parse the arguments
@@ -40,7 +46,7 @@ if __name__ == "__main__":
     data_model = create_data_model(cities)
     
     print("################# Benchmark Solution #################")
-    solution_benchmark = benchmark(data_model["locations"])
+    solution_benchmark = benchmark(data_model["locations"], time_limit=args.benchmark_time)
     print_solution(solution_benchmark[0], solution_benchmark[1], solution_benchmark[2])
     route = find_route(solution_benchmark[1], solution_benchmark[2])
     plot_locations_with_connections(solution_benchmark[3]["locations"], route, "Solution found using benchmark")
@@ -50,7 +56,27 @@ if __name__ == "__main__":
     initial_temperature = 10000000
     cooling_rate = 1
     min_temperature = 1
-    best_route, best_distance = simulated_annealing(distance_matrix, initial_temperature, cooling_rate, min_temperature, 20)
+    if args.tempering > 0:
+        stopping = StoppingCriteria(time_limit=args.time_limit)
+        best_route, best_distance, exchanges = parallel_tempering(distance_matrix, num_replicas=args.tempering,
+                                                                  num_sweeps=2000, stopping=stopping)
+        print(f"Replica exchanges accepted: {exchanges['accepted']}/{exchanges['attempted']}")
+        print(f"Stopped by: {stopping.reason}")
+    elif args.chains > 1:
+        best_route, best_distance, chain_stats = multi_start_annealing(distance_matrix, num_chains=args.chains,
+                                                                       initial_temperature=initial_temperature, cooling_rate=cooling_rate,
+                                                                       min_temperature=min_temperature, restart_threshold=20,
+                                                                       candidate_k=args.candidate_k)
+        for stats in chain_stats:
+            if stats["skipped"]:
+                print(f"Chain {stats['chain']:2d} (seed {stats['seed']}): skipped")
+            else:
+                print(f"Chain {stats['chain']:2d} (seed {stats['seed']}): {stats['distance']:.2f} m in {stats['time']:.2f} s")
+    else:
+        stopping = StoppingCriteria(time_limit=args.time_limit)
+        best_route, best_distance = simulated_annealing(distance_matrix, initial_temperature, cooling_rate, min_temperature, 20,
+                                                        stopping=stopping, candidate_k=args.candidate_k)
+        print(f"Stopped by: {stopping.reason}")
     print(f"Distance: {best_distance:.2f}  m\n")
     print_route(best_route)
     plot_locations_with_connections(data_model["locations"], best_route, "Solution found using custom SA")
@@ -0,0 +1,62 @@
+import math
+import random
+
+from tsp_utils.general import compute_euclidean_distance_matrix, generate_random_points
+from tsp_utils.distance import tour_length
+from tsp_utils.stopping import StoppingCriteria
+from algorithms.SA_implemented import parallel_tempering
+from algorithms.solver import solve
+
+
+def random_matrix(num_cities, seed=0):
+    random.seed(seed)
+    return compute_euclidean_distance_matrix(generate_random_points(num_cities))
+
+
+def check_tour(route, distance, distance_matrix):
+    num_cities = len(distance_matrix)
+    assert route[0] == route[-1]
+    assert sorted(route[:-1]) == list(range(num_cities))
+    assert math.isclose(distance, tour_length(route[:-1], distance_matrix), rel_tol=1e-9)
+
+
+def test_replicas_exchange_and_return_a_valid_tour():
+    distance_matrix = random_matrix(30)
+    route, distance, exchanges = parallel_tempering(distance_matrix, num_replicas=6, num_sweeps=100,
+                                                    sweep_size=50, seed=1)
+    check_tour(route, distance, distance_matrix)
+    assert exchanges["attempted"] > 0
+    assert 0 < exchanges["accepted"] <= exchanges["attempted"]
+
+
+def test_serial_runs_are_reproducible_and_leave_global_random_alone():
+    distance_matrix = random_matrix(20)
+    random.seed(7)
+    expected = random.random()
+    random.seed(7)
+    first = parallel_tempering(distance_matrix, num_replicas=4, num_sweeps=30, seed=3)
+    assert random.random() == expected
+    second = parallel_tempering(distance_matrix, num_replicas=4, num_sweeps=30, seed=3)
+    assert first == second
+
+
+def test_parallel_mode_returns_a_valid_tour():
+    distance_matrix = random_matrix(20)
+    route, distance, exchanges = parallel_tempering(distance_matrix, num_replicas=3, num_sweeps=20,
+                                                    sweep_size=20, parallel=True, seed=2)
+    check_tour(route, distance, distance_matrix)
+    assert exchanges["attempted"] > 0
+
+
+def test_stopping_and_solve_engine():
+    distance_matrix = random_matrix(25)
+    stopping = StoppingCriteria(max_evaluations=1000)
+    route, distance, _ = parallel_tempering(distance_matrix, num_replicas=4, num_sweeps=1000, sweep_size=50,
+                                            seed=4, stopping=stopping)
+    check_tour(route, distance, distance_matrix)
+    assert stopping.reason == "max_evaluations"
+
+    random.seed(5)
+    result = solve(generate_random_points(25), engine="sa_pt", budget=0.5, num_replicas=4, seed=5)
+    assert sorted(result.tour) == list(range(25))
+    assert result.stop_reason in ("time_limit", "num_sweeps")
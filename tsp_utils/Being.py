@@ -1,34 +1,75 @@
+from array import array
+import numpy as np
+
+def route_array(route):
+    """
+    Stores a route as a compact typed array: 2 bytes per city up to 65536 cities, 4 bytes above.
+    Arrays are returned unchanged, so in place mutations keep working on the same object.
+
+    :param route: The sequence of cities (list[int] | array | numpy.ndarray)
+    :return: route as array('H') or array('I')
+    :rtype: array
+    """
+    if isinstance(route, array):
+        return route
+    if isinstance(route, np.ndarray):
+        route = route.tolist()
+    return array('H' if len(route) <= 65536 else 'I', route)
+
 class Being:
+    """
+    Member of the GA population. Slotted and array backed to keep large populations small.
+    Lineage (parents) and mutation history are only kept when a LineageLog is attached with
+    Being.set_lineage_log, and then they go to that log instead of to each being.
+    """
+    __slots__ = ("route", "born_on", "mutation_number", "fitness", "length", "id")
+
     static_ID = 0
-    
-    def __init__(self, route, parentsID=[0, 0], mutation_number=0, born_on=0, fitness=0):
+    lineage = None
+
+    def __init__(self, route, parentsID=None, mutation_number=0, born_on=0, fitness=0):
         """
         Initializes a new Being instance.
-        
+
         :param route: The path or sequence of cities (list[int])
-        :param parentsID: List of two IDs representing the parents (list[int], optional)
+        :param parentsID: List of two IDs representing the parents, recorded only in the lineage log (list[int], optional)
         :param mutation_number: Count of mutations for this being (int, optional)
         :param born_on: The generation when this being was created (int, optional)
         :param fitness: The fitness score of this being, where higher is better (float, optional)
         """
-        self.route = route
-        self.parentsID = parentsID
+        self.route = route_array(route)
         self.born_on = born_on
         self.mutation_number = mutation_number
         self.fitness = fitness
-        self.mutation_type=[]
+        self.length = None
         Being.static_ID += 1
         self.id = Being.static_ID
-        
+        if Being.lineage is not None:
+            Being.lineage.birth(self.id, parentsID, born_on)
+
+    @property
+    def parentsID(self):
+        """IDs of the parents from the lineage log, None when lineage is not tracked."""
+        if Being.lineage is None:
+            return None
+        return Being.lineage.parents(self.id)
+
+    @property
+    def mutation_type(self):
+        """Mutation names from the lineage log, None when lineage is not tracked."""
+        if Being.lineage is None:
+            return None
+        return Being.lineage.mutations(self.id)
+
     def get_info(self):
         """
         Returns a summary of the being's properties in a dictionary format.
-        
+
         :return: A dictionary with keys 'route', 'parentsID', 'mutation_number', 'mutation_type', 'born_on', 'fitness', 'distance', 'id'
         :rtype: dict
         """
         return {
-            'route': self.route,
+            'route': list(self.route),
             'parentsID': self.parentsID,
             'mutation_number': self.mutation_number,
             'mutation_type': self.mutation_type,
@@ -38,25 +79,37 @@ class Being:
             'id': self.id
         }
 
-    
+
     def update_mutation_number(self, number_of_new_mutations=1, mutation_type=None):
         """
-        Increments the mutation number and tracks the type of mutation if provided.
-        
+        Increments the mutation number and records the type of mutation in the lineage log, if any.
+
         :param number_of_new_mutations: Number of new mutations to add (int, optional)
         :param mutation_type: A string representing the type of mutation (str, optional)
         """
         self.mutation_number += number_of_new_mutations
-        self.mutation_type.append(mutation_type)
+        if Being.lineage is not None:
+            Being.lineage.mutation(self.id, mutation_type)
 
 
     def set_route(self, new_route):
         """
-        Sets a new route for the being.
-        
+        Sets a new route for the being. The cached length is dropped, so the being is evaluated
+        again on the next ranking.
+
         :param new_route: A list representing the new route
         """
-        self.route = new_route
+        self.route = route_array(new_route)
+        self.length = None
+
+    def set_length(self, length):
+        """
+        Caches the tour length of the current route and the fitness derived from it.
+
+        :param length: Length of the closed tour (float)
+        """
+        self.length = length
+        self.fitness = 1.0 / length
 
     @staticmethod
     def reset_ids():
@@ -64,18 +117,30 @@ class Being:
         Resets the static ID counter to 0.
         """
         Being.static_ID = 0
-        
+
+    @staticmethod
+    def set_lineage_log(log):
+        """
+        Attaches the log that records the births and mutations of every new being. None turns
+        lineage tracking off (the default).
+
+        :param log: Log with birth(being_id, parents_ids, born_on) and mutation(being_id, mutation_type) methods (LineageLog)
+        """
+        Being.lineage = log
+
     def __str__(self):
         """
         Returns a string representation of the Being instance.
-        
+
         :return: A string summarizing the being
         """
         aux_str = ""
         if(self.mutation_number !=0):
-            aux_str = f"Was suffered mutation of type: {self.mutation_type}"
-            
+            mutation_type = self.mutation_type
+            aux_str = (f"Was suffered mutation of type: {mutation_type}" if mutation_type is not None
+                       else f"Was suffered {self.mutation_number} mutations")
+
         else :
             aux_str = "Hasn't suffered mutation"
-        return (f"Being {self.id} born_on {self.born_on}." + aux_str + 
-                f"Originated from {self.parentsID}. \n\t {self.route})")
+        return (f"Being {self.id} born_on {self.born_on}." + aux_str +
+                f"Originated from {self.parentsID}. \n\t {list(self.route)})")
@@ -0,0 +1,123 @@
+import random
+import numpy as np
+from tsp_utils.distance import tour_length
+from tsp_utils.local_search import reverse_segment
+
+class Tour:
+    """
+    Closed tour stored as an order list plus its inverse (position of each city), so next/prev,
+    position and edge membership queries are O(1). Plain lists are used because scalar reads
+    from them are the fastest in the Python inner loops of the solvers.
+
+    Item and slice assignment keep both lists in sync, which lets the list based operators
+    (swap/inversion/scramble mutations, SA neighbors, TS neighborhood) modify a Tour in place.
+    Assignments must only permute the cities of the tour.
+    """
+
+    def __init__(self, route):
+        """
+        Initializes a new Tour instance.
+
+        :param route: The sequence of cities, with or without the first city repeated at the end (list[int])
+        """
+        route = list(route)
+        if len(route) > 1 and route[0] == route[-1]:
+            route = route[:-1]
+        self.order = [int(city) for city in route]
+        self.positions = [0] * len(route)
+        for index, city in enumerate(route):
+            self.positions[city] = index
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __getitem__(self, index):
+        """Cities by index; slices return plain lists so copies behave like the list routes."""
+        return self.order[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self.order)))
+            value = list(value)
+            if len(value) != len(indices):
+                raise ValueError("A Tour can only be permuted, not resized.")
+            for k, city in zip(indices, value):
+                self.order[k] = city
+                self.positions[city] = k
+        else:
+            index %= len(self.order)
+            self.order[index] = value
+            self.positions[value] = index
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.order, dtype=dtype if dtype is not None else np.intp)
+
+    def __eq__(self, other):
+        if isinstance(other, Tour):
+            return self.order == other.order
+        return self.order == list(other)
+
+    def __repr__(self):
+        return f"Tour({self.order})"
+
+    def position(self, city):
+        """Index of a city in the tour."""
+        return self.positions[city]
+
+    def next(self, city):
+        """City visited right after the given one."""
+        index = self.positions[city] + 1
+        return self.order[index if index < len(self.order) else 0]
+
+    def prev(self, city):
+        """City visited right before the given one."""
+        return self.order[self.positions[city] - 1]
+
+    def has_edge(self, city1, city2):
+        """True if the tour goes directly between the two cities (in either direction)."""
+        return self.next(city1) == city2 or self.prev(city1) == city2
+
+    def reverse(self, i, j):
+        """
+        Reverses the cyclic segment of indices i..j (inclusive). The shorter of the segment and its
+        complement is flipped, which is the same cyclic tour.
+        """
+        reverse_segment(self.order, self.positions, i, j)
+
+    def reverse_path(self, city1, city2):
+        """Reverses the path that goes from city1 to city2 following the tour."""
+        self.reverse(self.positions[city1], self.positions[city2])
+
+    def swap(self, i, j):
+        """Swaps the cities at indices i and j."""
+        self[i], self[j] = self[j], self[i]
+
+    def scramble(self, start, end):
+        """Shuffles the cities at indices start..end-1."""
+        subset = self[start:end]
+        random.shuffle(subset)
+        self[start:end] = subset
+
+    def length(self, distance_matrix):
+        """Length of the closed tour."""
+        return tour_length(self.order, distance_matrix)
+
+    def copy(self):
+        tour = Tour.__new__(Tour)
+        tour.order = self.order[:]
+        tour.positions = self.positions[:]
+        return tour
+
+    def to_list(self, closed=False):
+        """
+        Returns the tour as a list.
+
+        :param closed: repeat the first city at the end (bool, optional)
+        """
+        route = self.order[:]
+        if closed and route:
+            route.append(route[0])
+        return route
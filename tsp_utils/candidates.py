@@ -0,0 +1,106 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from tsp_utils.distance import nearest_unvisited
+
+def build_candidate_lists(locations, k=10):
+    '''
+    Builds the k nearest neighbors of every city with a KD-tree (2D or 3D points).
+
+    :param locations: List of points as (x, y) or (x, y, z) tuples, or an (n, dim) array
+    :type locations: list[tuple] | numpy.ndarray
+    :param k: Number of candidates per city, clipped to n - 1, defaults to 10
+    :type k: int, optional
+    :raises ValueError: Locations must be 2D or 3D points
+    :return: (n, k) array; row i holds the neighbors of city i sorted by distance
+    :rtype: numpy.ndarray
+    '''
+    points = np.asarray(locations, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] not in (2, 3):
+        raise ValueError("Locations must be 2D or 3D points.")
+    num_cities = points.shape[0]
+    k = max(0, min(k, num_cities - 1))
+    if k == 0:
+        return np.empty((num_cities, 0), dtype=np.intp)
+    _, neighbors = cKDTree(points).query(points, k=k + 1)
+    return _drop_self(np.asarray(neighbors, dtype=np.intp).reshape(num_cities, k + 1))
+
+def candidate_lists_from_matrix(distance_matrix, k=10):
+    '''
+    Builds the k nearest neighbors of every city from an existing distance matrix, for the
+    solvers that only receive the matrix.
+
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param k: Number of candidates per city, clipped to n - 1, defaults to 10
+    :type k: int, optional
+    :return: (n, k) array; row i holds the neighbors of city i sorted by distance
+    :rtype: numpy.ndarray
+    '''
+    distances = np.asarray(distance_matrix)
+    num_cities = len(distances)
+    k = max(0, min(k, num_cities - 1))
+    if k == 0:
+        return np.empty((num_cities, 0), dtype=np.intp)
+    nearest = np.argpartition(distances, k, axis=1)[:, :k + 1]
+    order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind="stable")
+    return _drop_self(np.take_along_axis(nearest, order, axis=1).astype(np.intp))
+
+def shared_candidate_lists(locations, k, candidates=None):
+    '''
+    k nearest neighbors of every city, sliced from precomputed candidate lists when they hold at
+    least k neighbors (rows are sorted by distance), otherwise built with build_candidate_lists.
+
+    :param locations: List of points as (x, y) or (x, y, z) tuples, or an (n, dim) array
+    :type locations: list[tuple] | numpy.ndarray
+    :param k: Number of candidates per city, clipped to n - 1
+    :type k: int
+    :param candidates: Precomputed candidate lists, defaults to None
+    :type candidates: numpy.ndarray, optional
+    :return: (n, k) array; row i holds the neighbors of city i sorted by distance
+    :rtype: numpy.ndarray
+    '''
+    if candidates is not None:
+        candidates = np.asarray(candidates)
+        k = max(0, min(k, len(candidates) - 1))
+        if candidates.shape[1] >= k:
+            return candidates[:, :k]
+    return build_candidate_lists(locations, k)
+
+def _drop_self(neighbors):
+    # Coincident cities can push a city out of its own k + 1 query; then the farthest is dropped
+    num_cities, width = neighbors.shape
+    self_mask = neighbors == np.arange(num_cities)[:, None]
+    self_mask[~self_mask.any(axis=1), -1] = True
+    return neighbors[~self_mask].reshape(num_cities, width - 1)
+
+def candidate_nearest_route(start_city, distance_matrix, candidates):
+    '''
+    Nearest neighbor tour that only looks at the candidate list of the current city and falls
+    back to a full scan when all candidates were already visited.
+
+    :param start_city: first city of the route
+    :type start_city: int
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param candidates: Candidate lists built with build_candidate_lists or candidate_lists_from_matrix
+    :type candidates: numpy.ndarray
+    :return: route visiting every city once (not closed)
+    :rtype: list[int]
+    '''
+    num_cities = len(distance_matrix)
+    candidate_rows = np.asarray(candidates).tolist()
+    visited = np.zeros(num_cities, dtype=bool)
+    visited[start_city] = True
+    route = [start_city]
+    current_city = start_city
+    for _ in range(num_cities - 1):
+        for city in candidate_rows[current_city]:
+            if not visited[city]:
+                next_city = city
+                break
+        else:
+            next_city = nearest_unvisited(distance_matrix[current_city], visited)
+        route.append(next_city)
+        visited[next_city] = True
+        current_city = next_city
+    return route
@@ -0,0 +1,342 @@
+import random
+import numpy as np
+
+# Every operator takes two parent routes (lists with the same cities) and returns a child route.
+# New operators only need to be added to CROSSOVER_OPERATORS to be usable by the GA.
+
+def cut_points(num_cities):
+    gene_a = int(random.random() * num_cities)
+    gene_b = int(random.random() * num_cities)
+    return min(gene_a, gene_b), max(gene_a, gene_b)
+
+# Order Crossover (OX): slice of parent1 kept in place, the rest filled in parent2 order
+def order_crossover(parent1, parent2):
+    num_cities = len(parent1)
+    start, end = cut_points(num_cities)
+    child = [None] * num_cities
+    child[start:end] = parent1[start:end]
+    taken = [False] * num_cities
+    for gene in parent1[start:end]:
+        taken[gene] = True
+    parent2_genes = [gene for gene in parent2 if not taken[gene]]
+    child[:start] = parent2_genes[:start]
+    child[end:] = parent2_genes[start:]
+    return child
+
+# Partially Mapped Crossover (PMX): slice of parent1, conflicts resolved through the slice mapping
+def partially_mapped_crossover(parent1, parent2):
+    num_cities = len(parent1)
+    start, end = cut_points(num_cities)
+    child = parent2[:]
+    child[start:end] = parent1[start:end]
+    mapping = {parent1[i]: parent2[i] for i in range(start, end)}
+    for i in list(range(start)) + list(range(end, num_cities)):
+        gene = parent2[i]
+        while gene in mapping:
+            gene = mapping[gene]
+        child[i] = gene
+    return child
+
+# Cycle Crossover (CX): alternates the position cycles of the parents
+def cycle_crossover(parent1, parent2):
+    num_cities = len(parent1)
+    position1 = [0] * num_cities
+    for index, gene in enumerate(parent1):
+        position1[gene] = index
+    child = [None] * num_cities
+    from_parent1 = True
+    for start in range(num_cities):
+        if child[start] is not None:
+            continue
+        index = start
+        while child[index] is None:
+            child[index] = parent1[index] if from_parent1 else parent2[index]
+            index = position1[parent2[index]]
+        from_parent1 = not from_parent1
+    return child
+
+# Edge Recombination Crossover (ERX): builds the child from the union of the parents' edges
+def edge_recombination_crossover(parent1, parent2):
+    num_cities = len(parent1)
+    neighbors = [set() for _ in range(num_cities)]
+    for parent in (parent1, parent2):
+        for i in range(num_cities):
+            city, next_city = parent[i], parent[(i + 1) % num_cities]
+            neighbors[city].add(next_city)
+            neighbors[next_city].add(city)
+    # Unvisited cities kept in a list with an index map for O(1) removal and random picks
+    unvisited = list(range(num_cities))
+    unvisited_index = list(range(num_cities))
+
+    def remove(city):
+        index = unvisited_index[city]
+        last = unvisited[-1]
+        unvisited[index] = last
+        unvisited_index[last] = index
+        unvisited.pop()
+
+    city = parent1[0]
+    child = []
+    while True:
+        child.append(city)
+        remove(city)
+        for neighbor in neighbors[city]:
+            neighbors[neighbor].discard(city)
+        if not unvisited:
+            return child
+        if neighbors[city]:
+            fewest = min(len(neighbors[neighbor]) for neighbor in neighbors[city])
+            city = random.choice([neighbor for neighbor in neighbors[city]
+                                  if len(neighbors[neighbor]) == fewest])
+        else:
+            city = random.choice(unvisited)
+
+CROSSOVER_OPERATORS = {
+    "ox": order_crossover,
+    "pmx": partially_mapped_crossover,
+    "cx": cycle_crossover,
+    "erx": edge_recombination_crossover,
+}
+
+def get_crossover(crossover):
+    '''
+    Resolves a crossover operator.
+
+    :param crossover: Name registered in CROSSOVER_OPERATORS or a function (parent1, parent2) -> child
+    :type crossover: str | callable
+    :raises ValueError: Unknown crossover operator
+    :return: crossover function
+    :rtype: callable
+    '''
+    if callable(crossover):
+        return crossover
+    if crossover not in CROSSOVER_OPERATORS:
+        raise ValueError(f"Unknown crossover operator: {crossover}")
+    return CROSSOVER_OPERATORS[crossover]
+
+def batch_order_crossover(parents1, parents2):
+    '''
+    Order Crossover of many parent pairs at once; one random slice per pair.
+
+    :param parents1: (pairs, n) array with the first parent of each pair
+    :type parents1: numpy.ndarray
+    :param parents2: (pairs, n) array with the second parent of each pair
+    :type parents2: numpy.ndarray
+    :return: (pairs, n) array of children
+    :rtype: numpy.ndarray
+    '''
+    parents1 = np.asarray(parents1, dtype=np.intp)
+    parents2 = np.asarray(parents2, dtype=np.intp)
+    num_pairs, num_cities = parents1.shape
+    rows = np.arange(num_pairs)[:, None]
+    cuts = np.sort(np.random.randint(0, num_cities, size=(num_pairs, 2)), axis=1)
+    positions = np.arange(num_cities)[None, :]
+    in_slice = (positions >= cuts[:, :1]) & (positions < cuts[:, 1:])
+    # taken[r, city] is True when city is inside the slice copied from parents1[r]
+    taken = np.zeros((num_pairs, num_cities), dtype=bool)
+    taken[rows, parents1] = in_slice
+    keep = ~taken[rows, parents2]
+    children = np.where(in_slice, parents1, 0)
+    # Row-major boolean indexing keeps parent2 order inside each row, and every row has as
+    # many kept genes as free positions
+    children[~in_slice] = parents2[keep]
+    return children
+
+# Edge Assembly Crossover (EAX). Needs distances and neighbor lists for the subtour repair, so the
+# operator is built per problem with make_eax_crossover
+def tour_adjacency(route):
+    num_cities = len(route)
+    adjacency = [None] * num_cities
+    for i in range(num_cities):
+        adjacency[route[i]] = [route[i - 1], route[(i + 1) % num_cities]]
+    return adjacency
+
+def ab_cycles(adjacency1, adjacency2):
+    '''
+    Splits the edges that belong to only one parent into AB-cycles: closed walks that alternate
+    an edge of parent1 (A) and an edge of parent2 (B).
+
+    :return: list of cycles, each a list of cities [c0, c1, ..., c2k-1] where (c0, c1) is an A edge,
+        (c1, c2) a B edge and so on, closing with the B edge (c2k-1, c0); None if the walk gets stuck
+    :rtype: list[list[int]] | None
+    '''
+    num_cities = len(adjacency1)
+    remaining = []
+    for adjacency, other in ((adjacency1, adjacency2), (adjacency2, adjacency1)):
+        remaining.append([[city for city in adjacency[c] if city not in other[c]] for c in range(num_cities)])
+    remaining_a, remaining_b = remaining
+    cycles = []
+    # index_at[parity][city]: position of city in the current path with that parity, or -1
+    index_at = [[-1] * num_cities, [-1] * num_cities]
+    for start in range(num_cities):
+        while remaining_a[start]:
+            path = [start]
+            index_at[0][start] = 0
+            while True:
+                step = len(path) - 1
+                city = path[-1]
+                edges = remaining_a if step % 2 == 0 else remaining_b
+                if not edges[city]:
+                    for k, c in enumerate(path):
+                        index_at[k % 2][c] = -1
+                    return None
+                next_city = edges[city].pop(random.randrange(len(edges[city])))
+                edges[next_city].remove(city)
+                parity = (step + 1) % 2
+                earlier = index_at[parity][next_city]
+                if earlier == -1:
+                    path.append(next_city)
+                    index_at[parity][next_city] = step + 1
+                    continue
+                # Closed an alternating cycle path[earlier..] -> next_city
+                cycle = path[earlier:]
+                for k in range(earlier + 1, len(path)):
+                    index_at[k % 2][path[k]] = -1
+                del path[earlier + 1:]
+                # Normalize so the cycle starts with an A edge
+                if earlier % 2 == 1:
+                    cycle = cycle[1:] + cycle[:1]
+                cycles.append(cycle)
+                if len(path) == 1 and not remaining_a[start]:
+                    index_at[0][start] = -1
+                    break
+    return cycles
+
+def apply_ab_cycle(adjacency, cycle):
+    '''Removes the A edges of an AB-cycle from the adjacency and adds its B edges.'''
+    length = len(cycle)
+    for k in range(0, length, 2):
+        u, v = cycle[k], cycle[k + 1]
+        adjacency[u].remove(v)
+        adjacency[v].remove(u)
+    for k in range(1, length, 2):
+        u, v = cycle[k], cycle[(k + 1) % length]
+        adjacency[u].append(v)
+        adjacency[v].append(u)
+
+def subtours(adjacency):
+    '''Lists the cycles (as city lists) of a degree-2 adjacency.'''
+    num_cities = len(adjacency)
+    label = [-1] * num_cities
+    cycles = []
+    for start in range(num_cities):
+        if label[start] != -1:
+            continue
+        cycle = [start]
+        label[start] = len(cycles)
+        previous, city = start, adjacency[start][0]
+        while city != start:
+            cycle.append(city)
+            label[city] = len(cycles)
+            a, b = adjacency[city]
+            previous, city = city, (b if a == previous else a)
+        cycles.append(cycle)
+    return cycles, label
+
+def cheapest_merge(subtour, label, subtour_label, adjacency, dist, neighbors_of):
+    # Cheapest exchange of an edge (u, u2) of the subtour and an edge (v, v2) outside it
+    best = None
+    for u in subtour:
+        neighbors = [v for v in neighbors_of(u) if label[v] != subtour_label]
+        for u2 in adjacency[u]:
+            for v in neighbors:
+                for v2 in adjacency[v]:
+                    for a, b in ((v, v2), (v2, v)):
+                        cost = dist[u][a] + dist[u2][b] - dist[u][u2] - dist[v][v2]
+                        if best is None or cost < best[0]:
+                            best = (cost, u, u2, v, v2, a, b)
+    return best
+
+def merge_subtours(adjacency, dist, candidates):
+    '''
+    Greedy subtour repair: the smallest subtour is joined to another one with the cheapest 2-opt
+    style exchange found among the neighbor lists, until a single tour remains.
+    '''
+    while True:
+        cycles, label = subtours(adjacency)
+        if len(cycles) == 1:
+            return cycles[0]
+        smallest = min(range(len(cycles)), key=lambda k: len(cycles[k]))
+        best = cheapest_merge(cycles[smallest], label, smallest, adjacency, dist,
+                              lambda u: candidates[u])
+        if best is None:
+            # No candidate list leaves the subtour; scan every outside city instead
+            outside = [v for v in range(len(adjacency)) if label[v] != smallest]
+            best = cheapest_merge(cycles[smallest], label, smallest, adjacency, dist, lambda u: outside)
+        _, u, u2, v, v2, a, b = best
+        adjacency[u].remove(u2)
+        adjacency[u2].remove(u)
+        adjacency[v].remove(v2)
+        adjacency[v2].remove(v)
+        adjacency[u].append(a)
+        adjacency[a].append(u)
+        adjacency[u2].append(b)
+        adjacency[b].append(u2)
+
+def eax_crossover(parent1, parent2, dist, candidates, strategy="single", max_children=5):
+    '''
+    Edge Assembly Crossover. AB-cycles are built from the edges of only one parent, an E-set of
+    AB-cycles is applied to parent1 (its A edges replaced by the B edges) and the resulting
+    subtours are merged greedily with the neighbor lists.
+
+    :param parent1: First parent route
+    :type parent1: list[int]
+    :param parent2: Second parent route
+    :type parent2: list[int]
+    :param dist: Distances as nested lists (as_nested_list)
+    :type dist: list[list[float]]
+    :param candidates: Candidate lists (lists of neighbor cities sorted by distance)
+    :type candidates: list[list[int]]
+    :param strategy: "single" applies one AB-cycle per child (EAX-1AB) and returns the best of up to
+        max_children children; "rand" applies each AB-cycle with probability 0.5. Defaults to "single"
+    :type strategy: str, optional
+    :param max_children: Children generated by the "single" strategy, defaults to 5
+    :type max_children: int, optional
+    :return: child route
+    :rtype: list[int]
+    '''
+    num_cities = len(parent1)
+    if num_cities < 4:
+        return list(parent1)
+    adjacency1 = tour_adjacency(parent1)
+    cycles = ab_cycles(adjacency1, tour_adjacency(parent2))
+    if cycles is None:
+        return order_crossover(parent1, parent2)
+    # No AB-cycle means both parents are the same tour
+    if not cycles:
+        return list(parent1)
+    if strategy == "rand":
+        e_sets = [[cycle for cycle in cycles if random.random() < 0.5] or [random.choice(cycles)]]
+    else:
+        e_sets = [[cycle] for cycle in random.sample(cycles, min(max_children, len(cycles)))]
+    best_child, best_length = None, None
+    for e_set in e_sets:
+        adjacency = [neighbors[:] for neighbors in adjacency1]
+        for cycle in e_set:
+            apply_ab_cycle(adjacency, cycle)
+        child = merge_subtours(adjacency, dist, candidates)
+        length = sum(dist[child[i - 1]][child[i]] for i in range(num_cities))
+        if best_length is None or length < best_length:
+            best_child, best_length = child, length
+    return best_child
+
+def make_eax_crossover(distance_matrix, candidates, strategy="single", max_children=5, dist=None):
+    '''
+    Builds an EAX operator with the (parent1, parent2) -> child signature used by the GA.
+
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param candidates: Candidate lists built with tsp_utils.candidates
+    :type candidates: numpy.ndarray
+    :param dist: Nested list view of the matrix (as_nested_list), computed when not given
+    :type dist: list[list[float]], optional
+    :return: crossover function
+    :rtype: callable
+    '''
+    if dist is None:
+        dist = np.asarray(distance_matrix).tolist()
+    candidate_rows = np.asarray(candidates).tolist()
+
+    def eax(parent1, parent2):
+        return eax_crossover(parent1, parent2, dist, candidate_rows, strategy, max_children)
+    return eax
@@ -0,0 +1,107 @@
+import numpy as np
+
+def compute_distance_array(locations, dtype=np.float64):
+    '''
+    Computes the Euclidean distance matrix for 2D or 3D points as a contiguous NumPy array.
+    The squared differences are accumulated one coordinate at a time, so the only temporaries
+    are n x n arrays (no n x n x dim broadcast).
+
+    :param locations: List of points as (x, y) or (x, y, z) tuples, or an (n, dim) array
+    :type locations: list[tuple] | numpy.ndarray
+    :param dtype: Floating point type of the matrix, defaults to numpy.float64
+    :type dtype: numpy.dtype, optional
+    :raises ValueError: Locations must be 2D or 3D points
+    :return: (n, n) C-contiguous matrix where [i, j] is the distance from city i to city j
+    :rtype: numpy.ndarray
+    '''
+    points = np.asarray(locations, dtype=dtype)
+    if points.ndim != 2 or points.shape[1] not in (2, 3):
+        raise ValueError("Locations must be 2D or 3D points.")
+    num_cities = points.shape[0]
+    matrix = np.zeros((num_cities, num_cities), dtype=dtype)
+    diff = np.empty_like(matrix)
+    for axis in range(points.shape[1]):
+        coords = points[:, axis]
+        np.subtract(coords[:, None], coords[None, :], out=diff)
+        np.multiply(diff, diff, out=diff)
+        matrix += diff
+    np.sqrt(matrix, out=matrix)
+    return np.ascontiguousarray(matrix)
+
+def as_nested_list(distance_matrix):
+    '''
+    Compatibility view of a distance matrix for code that still does scalar
+    distance_matrix[i][j] lookups in pure Python (nested lists are much faster than
+    indexing an ndarray element by element).
+
+    :param distance_matrix: Matrix computed with compute_distance_array
+    :type distance_matrix: numpy.ndarray
+    :return: Same distances as a list of lists of floats
+    :rtype: list[list[float]]
+    '''
+    if isinstance(distance_matrix, np.ndarray):
+        return distance_matrix.tolist()
+    return [[distance_matrix[i][j] for j in range(len(distance_matrix))]
+            for i in range(len(distance_matrix))]
+
+def tour_length(route, distance_matrix):
+    '''
+    Calculates the length of a closed tour with a single gather-and-sum.
+    The route may or may not repeat the starting city at the end.
+
+    :param route: sequence of cities to visit
+    :type route: list[int] | numpy.ndarray
+    :param distance_matrix: Matrix computed with compute_distance_array
+    :type distance_matrix: numpy.ndarray
+    :return: total distance of the tour
+    :rtype: float
+    '''
+    route = np.asarray(route, dtype=np.intp)
+    if route.size < 2:
+        return 0.0
+    return float(distance_matrix[route, np.roll(route, -1)].sum())
+
+def path_length(route, distance_matrix):
+    '''
+    Calculates the length of an open path (the last city is not connected back to the first).
+
+    :param route: sequence of cities to visit
+    :type route: list[int] | numpy.ndarray
+    :param distance_matrix: Matrix computed with compute_distance_array
+    :type distance_matrix: numpy.ndarray
+    :return: total distance of the path
+    :rtype: float
+    '''
+    route = np.asarray(route, dtype=np.intp)
+    if route.size < 2:
+        return 0.0
+    return float(distance_matrix[route[:-1], route[1:]].sum())
+
+def nearest_unvisited(distance_row, visited):
+    '''
+    Returns the closest city not yet visited.
+
+    :param distance_row: Row of the distance matrix for the current city
+    :type distance_row: numpy.ndarray
+    :param visited: Boolean mask with True for the cities already in the route
+    :type visited: numpy.ndarray
+    :return: index of the nearest unvisited city
+    :rtype: int
+    '''
+    return int(np.argmin(np.where(visited, np.inf, distance_row)))
+
+def tour_lengths(routes, distance_matrix):
+    '''
+    Calculates the length of many closed tours at once with one gather-and-sum.
+
+    :param routes: (population, n) array of tours, one tour per row
+    :type routes: numpy.ndarray | list[list[int]]
+    :param distance_matrix: Matrix computed with compute_distance_array
+    :type distance_matrix: numpy.ndarray
+    :return: (population,) array with the length of each tour
+    :rtype: numpy.ndarray
+    '''
+    routes = np.asarray(routes, dtype=np.intp)
+    if routes.ndim != 2:
+        raise ValueError("Routes must be a (population, n) array.")
+    return distance_matrix[routes, np.roll(routes, -1, axis=1)].sum(axis=1)
@@ -1,7 +1,9 @@
 import math
 import random
+import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D 
+from tsp_utils.distance import compute_distance_array, as_nested_list, tour_length, tour_lengths, path_length, nearest_unvisited
 
 def create_data_model(locations = None):
     """Stores the data for the problem."""
@@ -175,33 +177,16 @@ def parse_input(filename = "teste1.txt"):
 
     return locations
 
-def compute_euclidean_distance_matrix(locations, print_matrix=False):
+def compute_euclidean_distance_matrix(locations, print_matrix=False, dtype=np.float64):
     """
     Computes the distance matrix for 2D or 3D points.
 
     :param locations: List of points as (x, y) or (x, y, z) tuples.
     :param print_matrix: Whether to print the distance matrix.
-    :return: Distance matrix as a dictionary of dictionaries.
+    :param dtype: Floating point type of the matrix (numpy.float64 or numpy.float32).
+    :return: Distance matrix as a contiguous (n, n) numpy array, indexable as matrix[i][j] or matrix[i, j].
     """
-    dimensions = len(locations[0])
-    distances = {}
-    for from_counter, from_node in enumerate(locations):
-        distances[from_counter] = {}
-        for to_counter, to_node in enumerate(locations):
-            if from_counter == to_counter:
-                distances[from_counter][to_counter] = 0
-            else:
-                if dimensions == 2:  # 2D
-                    distances[from_counter][to_counter] = math.sqrt(
-                        (from_node[0] - to_node[0])**2 +
-                        (from_node[1] - to_node[1])**2
-                    )
-                elif dimensions == 3:  # 3D
-                    distances[from_counter][to_counter] = math.sqrt(
-                        (from_node[0] - to_node[0])**2 +
-                        (from_node[1] - to_node[1])**2 +
-                        (from_node[2] - to_node[2])**2
-                    )
+    distances = compute_distance_array(locations, dtype)
     if print_matrix:
         print_matrix_form(distances)
     return distances
@@ -284,7 +269,7 @@ def print_matrix_form(matrix):
     Prints in a human readable format the distance matrix 
 
     :param matrix: matrix with the distance  between all points can be calculated with compute_euclidean_distance_matrix
-    :type matrix: dict
+    :type matrix: numpy.ndarray
     '''
     num_locations = len(matrix)
     
@@ -295,7 +280,7 @@ def print_matrix_form(matrix):
     print()
     
     # Print each row of the matrix
-    for from_node, row in matrix.items():
+    for from_node, row in enumerate(as_nested_list(matrix)):
         print(f"{from_node:2} ", end=" ")  # Row label (from node)
         for to_node in range(num_locations):
             print(f"{row[to_node]:5}", end=" ")  # Each distance
@@ -305,22 +290,14 @@ def calculate_route_distance(distance_matrix, route):
     '''
     Calculates the total distance for a given route using the provided distance matrix.
 
-    :param distance_matrix: The distance matrix as a dictionary of dictionaries.
-    :type distance_matrix: (dict)
+    :param distance_matrix: The distance matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
     :param route: sequence of cities to visit
     :type route: list[int]
     :return: Total distance
-    :rtype: int
+    :rtype: float
     '''
-    total_distance = 0
-
-    # Calculate the distance for each step in the route
-    for i in range(len(route) - 1):
-        from_node = route[i]
-        to_node = route[i + 1]
-        total_distance += distance_matrix[from_node][to_node]
-
-    return total_distance
+    return path_length(route, distance_matrix)
 
 # no neeed for 3D
 def print_route(route):
@@ -356,6 +333,29 @@ def generate_random_points(num_points=20, dim=2):
     ]
     return points
 
+def canonical_route_key(route):
+    '''
+    Hashable key of a closed tour that is the same for every rotation and direction of the tour.
+    The tour is rotated to start at its smallest city and read in the direction whose second
+    city is the smallest of the two neighbors. A repeated closing city is ignored.
+
+    :param route: sequence of cities to visit
+    :type route: list[int]
+    :return: canonical form of the tour
+    :rtype: tuple(int)
+    '''
+    route = list(route)
+    if len(route) > 1 and route[0] == route[-1]:
+        route = route[:-1]
+    num_cities = len(route)
+    if num_cities < 3:
+        return tuple(sorted(route))
+    start = route.index(min(route))
+    rotated = route[start:] + route[:start]
+    if rotated[-1] < rotated[1]:
+        rotated = [rotated[0]] + rotated[:0:-1]
+    return tuple(rotated)
+
 # no neeed for 3D            
 def route_distance(route, distance_matix):
     '''
@@ -364,18 +364,11 @@ def route_distance(route, distance_matix):
     :param route: Tour; route to have total distance calculated
     :type route: list[int]
     :param distance_matix: Matrix with the distance form point to point
-    :type distance_matix: dict
+    :type distance_matix: numpy.ndarray
     :return: total distance of a route
     :rtype: float
     '''
-    
-    distance = 0.0
-    num_cities = len(route)
-    for i in range(num_cities):
-        from_city = route[i]
-        to_city = route[(i + 1) % num_cities]
-        distance += distance_matix[from_city][to_city]
-    return distance
+    return tour_length(route, distance_matix)
             
 if __name__ == "__main__":
     # Generate hexagon points
@@ -0,0 +1,218 @@
+from array import array
+import os
+import numpy as np
+
+class LineageLog:
+    """
+    Compact side log of the GA genealogy: one row per birth (being, parents, generation) and one
+    row per mutation (being, mutation type). Rows live in typed arrays instead of lists on each
+    Being, so a long run keeps only a few bytes per event.
+
+    Mutation types are stored as small integer codes; mutation_names maps a code back to its name.
+    """
+
+    def __init__(self):
+        self.birth_ids = array('I')
+        self.parents1 = array('I')
+        self.parents2 = array('I')
+        self.born_on = array('I')
+        self.mutation_ids = array('I')
+        self.mutation_codes = array('B')
+        self.mutation_names = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.birth_ids)
+
+    def mutation_code(self, mutation_type):
+        """Small integer code of a mutation type, registering new names on first use."""
+        code = self._codes.get(mutation_type)
+        if code is None:
+            code = len(self.mutation_names)
+            self._codes[mutation_type] = code
+            self.mutation_names.append(mutation_type)
+        return code
+
+    def birth(self, being_id, parents_ids, born_on):
+        """
+        Records a new being.
+
+        :param being_id: ID of the new being (int)
+        :param parents_ids: IDs of the two parents, 0 for beings without parents (list[int])
+        :param born_on: The generation when the being was created (int)
+        """
+        parent1, parent2 = parents_ids if parents_ids is not None else (0, 0)
+        self.birth_ids.append(being_id)
+        self.parents1.append(parent1)
+        self.parents2.append(parent2)
+        self.born_on.append(born_on)
+
+    def mutation(self, being_id, mutation_type):
+        """
+        Records a mutation of a being.
+
+        :param being_id: ID of the mutated being (int)
+        :param mutation_type: Name of the mutation (str)
+        """
+        self.mutation_ids.append(being_id)
+        self.mutation_codes.append(self.mutation_code(mutation_type))
+
+    def parents(self, being_id):
+        """
+        IDs of the parents of a being, or None if its birth was not recorded. When IDs were reset
+        during the log, the latest birth with that ID is used.
+        """
+        matches = np.flatnonzero(np.frombuffer(self.birth_ids, dtype=np.uint32) == being_id)
+        if matches.size == 0:
+            return None
+        index = int(matches[-1])
+        return [self.parents1[index], self.parents2[index]]
+
+    def mutations(self, being_id):
+        """Names of the mutations recorded for a being, in order."""
+        matches = np.flatnonzero(np.frombuffer(self.mutation_ids, dtype=np.uint32) == being_id)
+        return [self.mutation_names[self.mutation_codes[int(index)]] for index in matches]
+
+    def clear(self):
+        self.__init__()
+
+# Event kinds of the EventStream
+BIRTH, MUTATION, EVALUATION = 0, 1, 2
+
+# One fixed size record per event; parents are 0 for beings without parents, mutation and
+# length are only meaningful for MUTATION and EVALUATION events
+EVENT_DTYPE = np.dtype([
+    ("kind", np.uint8),
+    ("mutation", np.uint8),
+    ("generation", np.uint32),
+    ("being", np.uint32),
+    ("parent1", np.uint32),
+    ("parent2", np.uint32),
+    ("length", np.float64),
+])
+
+class EventStream:
+    """
+    Append-only genealogy stream of a GA run. Births, mutations and evaluations are buffered and
+    written in batches as raw EVENT_DTYPE records, so memory stays flat however long the run is and
+    the file can be memory-mapped with read_events while or after the run. Mutation names are
+    appended to a "<path>.mutations" text file, one name per code.
+
+    Has the birth/mutation interface of LineageLog, so it can be attached with Being.set_lineage_log.
+    """
+
+    def __init__(self, path, batch_size=4096):
+        """
+        Opens (truncates) the stream file.
+
+        :param path: Path of the event file (str)
+        :param batch_size: Events buffered before each write (int, optional)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.generation = 0
+        self.mutation_names = []
+        self._codes = {}
+        self._buffer = []
+        self._file = open(path, "wb")
+        self._names_file = open(mutation_names_path(path), "w")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _append(self, event):
+        self._buffer.append(event)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def mutation_code(self, mutation_type):
+        """Small integer code of a mutation type, registering new names on first use."""
+        code = self._codes.get(mutation_type)
+        if code is None:
+            code = len(self.mutation_names)
+            self._codes[mutation_type] = code
+            self.mutation_names.append(mutation_type)
+            self._names_file.write(f"{mutation_type}\n")
+            self._names_file.flush()
+        return code
+
+    def birth(self, being_id, parents_ids, born_on):
+        parent1, parent2 = parents_ids if parents_ids is not None else (0, 0)
+        self.generation = born_on
+        self._append((BIRTH, 0, born_on, being_id, parent1, parent2, 0.0))
+
+    def mutation(self, being_id, mutation_type):
+        # Mutations follow the births of the generation being built
+        self._append((MUTATION, self.mutation_code(mutation_type), self.generation, being_id, 0, 0, 0.0))
+
+    def evaluations(self, population, generation):
+        """
+        Records the length of the beings born on the given generation (the ones evaluated for it).
+
+        :param population: Ranked population (list[Being])
+        :param generation: Current generation (int)
+        """
+        for being in population:
+            if being.born_on == generation and being.length is not None:
+                self._append((EVALUATION, 0, generation, being.id, 0, 0, being.length))
+
+    def flush(self):
+        """Writes the buffered events to the file."""
+        if self._buffer:
+            self._file.write(np.array(self._buffer, dtype=EVENT_DTYPE).tobytes())
+            self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            self._names_file.close()
+
+    def parents(self, being_id):
+        """IDs of the parents of a being, read back from the stream (latest birth with that ID)."""
+        self.flush()
+        events = read_events(self.path)
+        births = np.flatnonzero((events["kind"] == BIRTH) & (events["being"] == being_id))
+        if births.size == 0:
+            return None
+        event = events[births[-1]]
+        return [int(event["parent1"]), int(event["parent2"])]
+
+    def mutations(self, being_id):
+        """Names of the mutations recorded for a being, read back from the stream."""
+        self.flush()
+        events = read_events(self.path)
+        codes = events["mutation"][(events["kind"] == MUTATION) & (events["being"] == being_id)]
+        return [self.mutation_names[code] for code in codes.tolist()]
+
+def mutation_names_path(path):
+    return path + ".mutations"
+
+def read_events(path):
+    '''
+    Memory-maps an event file written by EventStream.
+
+    :param path: Path of the event file
+    :type path: str
+    :return: read-only structured array with EVENT_DTYPE records
+    :rtype: numpy.memmap | numpy.ndarray
+    '''
+    num_events = os.path.getsize(path) // EVENT_DTYPE.itemsize
+    if num_events == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode="r", shape=(num_events,))
+
+def read_mutation_names(path):
+    '''
+    Mutation names of an event file, indexed by the mutation code of its MUTATION events.
+
+    :param path: Path of the event file
+    :type path: str
+    :rtype: list[str]
+    '''
+    with open(mutation_names_path(path)) as names_file:
+        return names_file.read().splitlines()
@@ -0,0 +1,175 @@
+from collections import deque
+from tsp_utils.distance import as_nested_list, tour_length
+
+# Improvements smaller than this are treated as float noise
+EPSILON = 1e-9
+
+def reverse_segment(route, position, i, j):
+    '''
+    Reverses the cyclic segment route[i..j] (inclusive, may wrap around). The complementary side
+    is reversed instead when it is shorter, which gives the same cyclic tour.
+
+    :param route: tour without the closing city, modified in place
+    :type route: list[int]
+    :param position: inverse of route (position[city] = index), modified in place
+    :type position: list[int]
+    :param i: index of the first city of the segment
+    :type i: int
+    :param j: index of the last city of the segment
+    :type j: int
+    '''
+    num_cities = len(route)
+    length = (j - i) % num_cities + 1
+    if 2 * length > num_cities:
+        i, j = (j + 1) % num_cities, (i - 1) % num_cities
+        length = num_cities - length
+    for _ in range(length // 2):
+        city_i, city_j = route[i], route[j]
+        route[i], route[j] = city_j, city_i
+        position[city_j], position[city_i] = i, j
+        i = (i + 1) % num_cities
+        j = (j - 1) % num_cities
+
+def try_2opt(city, route, position, dist, candidates):
+    '''
+    Looks for an improving 2-opt move that adds an edge from city to one of its candidates,
+    and applies the first one found.
+
+    :return: the four cities whose edges changed, or None if there is no improving move
+    :rtype: tuple(int) | None
+    '''
+    num_cities = len(route)
+    index = position[city]
+    for succ_side in (True, False):
+        other = route[(index + 1) % num_cities] if succ_side else route[index - 1]
+        removed = dist[city][other]
+        for candidate in candidates[city]:
+            gain = removed - dist[city][candidate]
+            if gain <= EPSILON:
+                break
+            candidate_index = position[candidate]
+            if succ_side:
+                next_city = route[(candidate_index + 1) % num_cities]
+            else:
+                next_city = route[candidate_index - 1]
+            if candidate == other or next_city == city:
+                continue
+            delta = dist[other][next_city] - dist[candidate][next_city] - gain
+            if delta < -EPSILON:
+                if succ_side:
+                    # ... city other ... candidate next_city ...  ->  reverse other..candidate
+                    reverse_segment(route, position, position[other], candidate_index)
+                else:
+                    # ... next_city candidate ... other city ...  ->  reverse candidate..other
+                    reverse_segment(route, position, candidate_index, position[other])
+                return city, other, candidate, next_city
+    return None
+
+def try_or_opt(city, route, position, dist, candidates, max_segment=3):
+    '''
+    Looks for an improving Or-opt move: the segment of 1 to max_segment cities starting at city
+    is moved, possibly reversed, next to one of the candidates of its end cities.
+
+    :return: route (new list), position and the cities whose edges changed, or None
+    :rtype: tuple | None
+    '''
+    num_cities = len(route)
+    if num_cities < 5:
+        return None
+    start = position[city]
+    for length in range(1, min(max_segment, num_cities - 3) + 1):
+        segment = [route[(start + k) % num_cities] for k in range(length)]
+        first, last = segment[0], segment[-1]
+        before = route[start - 1]
+        after = route[(start + length) % num_cities]
+        removal_gain = dist[before][first] + dist[last][after] - dist[before][after]
+        if removal_gain <= EPSILON:
+            continue
+        in_segment = set(segment)
+        for end_city in (first, last):
+            for candidate in candidates[end_city]:
+                # Gain criterion: the new edge at end_city must be shorter than what the removal saves
+                if dist[end_city][candidate] >= removal_gain:
+                    break
+                if candidate in in_segment:
+                    continue
+                candidate_index = position[candidate]
+                for left, right in ((candidate, route[(candidate_index + 1) % num_cities]),
+                                    (route[candidate_index - 1], candidate)):
+                    if left in in_segment or right in in_segment or (left == before and right == after):
+                        continue
+                    forward = dist[left][first] + dist[last][right]
+                    backward = dist[left][last] + dist[first][right]
+                    insertion = min(forward, backward) - dist[left][right]
+                    if insertion - removal_gain < -EPSILON:
+                        if backward < forward:
+                            segment.reverse()
+                        rest = [c for c in route if c not in in_segment]
+                        insert_at = rest.index(left) + 1
+                        new_route = rest[:insert_at] + segment + rest[insert_at:]
+                        new_position = [0] * num_cities
+                        for k, c in enumerate(new_route):
+                            new_position[c] = k
+                        return new_route, new_position, (before, after, left, right, first, last)
+    return None
+
+def local_search(route, distance_matrix, candidates, use_2opt=True, use_or_opt=True, max_moves=None, dist=None):
+    '''
+    Neighbor-list restricted 2-opt and Or-opt descent with don't-look bits. Only cities whose
+    edges changed are queued again, so a pass over an already good tour is close to O(n * k).
+
+    :param route: tour, with or without the first city repeated at the end
+    :type route: list[int]
+    :param distance_matrix: Matrix computed with compute_euclidean_distance_matrix
+    :type distance_matrix: numpy.ndarray
+    :param candidates: Candidate lists built with tsp_utils.candidates, sorted by distance
+    :type candidates: numpy.ndarray | list[list[int]]
+    :param use_2opt: Try 2-opt moves, defaults to True
+    :type use_2opt: bool, optional
+    :param use_or_opt: Try Or-opt moves, defaults to True
+    :type use_or_opt: bool, optional
+    :param max_moves: Maximum number of improving moves to apply, defaults to None (until local optimum)
+    :type max_moves: int, optional
+    :param dist: Nested list view of the matrix (as_nested_list), computed when not given
+    :type dist: list[list[float]], optional
+    :return: improved tour (same form as the input) and its length
+    :rtype: tuple(list[int], float)
+    '''
+    closed = len(route) > 1 and route[0] == route[-1]
+    route = [int(city) for city in (route[:-1] if closed else route)]
+    if dist is None:
+        dist = as_nested_list(distance_matrix)
+    if not isinstance(candidates, list):
+        candidates = candidates.tolist()
+    num_cities = len(route)
+    position = [0] * num_cities
+    for index, city in enumerate(route):
+        position[city] = index
+
+    if num_cities >= 4:
+        queue = deque(route)
+        queued = [True] * num_cities
+        moves = 0
+        while queue and (max_moves is None or moves < max_moves):
+            city = queue.popleft()
+            queued[city] = False
+            changed = try_2opt(city, route, position, dist, candidates) if use_2opt else None
+            if changed is None and use_or_opt:
+                result = try_or_opt(city, route, position, dist, candidates)
+                if result is not None:
+                    route, position, changed = result
+            if changed is None:
+                continue
+            moves += 1
+            for touched in changed:
+                if not queued[touched]:
+                    queued[touched] = True
+                    queue.append(touched)
+            if not queued[city]:
+                queued[city] = True
+                queue.append(city)
+
+    length = tour_length(route, distance_matrix)
+    if closed:
+        route.append(route[0])
+    return route, length
@@ -0,0 +1,93 @@
+import math
+import time
+
+# Improvements smaller than this (relative) don't reset the stagnation window
+IMPROVEMENT_TOLERANCE = 1e-9
+
+# Inner loops with cheap steps (e.g. one SA move) check expired() once every this many steps
+EXPIRY_CHECK_INTERVAL = 64
+
+class StoppingCriteria:
+    """
+    Stopping rules shared by the solvers: wall-clock deadline, target length, stagnation window
+    and maximum number of evaluations. Every criterion is optional; a solver calls start() before
+    its main loop and update() once per iteration (generation, temperature step, ...), which only
+    costs a clock read and a few comparisons.
+
+    After the run, reason holds the criterion that fired ("time_limit", "target", "stagnation",
+    "max_evaluations") or the solver's own limit when none did (e.g. "generations"), and trace
+    holds the convergence of the run as (seconds, evaluations, best length) at every improvement.
+    """
+
+    def __init__(self, time_limit=None, target_length=None, target_gap=0.0, stagnation=None, max_evaluations=None):
+        """
+        Initializes a new StoppingCriteria instance.
+
+        :param time_limit: Wall-clock budget in seconds (float, optional)
+        :param target_length: Stop once the best length is within target_gap of it (float, optional)
+        :param target_gap: Relative tolerance of the target, 0.01 stops within 1% (float, optional)
+        :param stagnation: Iterations without improvement of the best length before stopping (int, optional)
+        :param max_evaluations: Maximum number of tour evaluations (int, optional)
+        """
+        self.time_limit = time_limit
+        self.target_length = target_length
+        self.target_gap = target_gap
+        self.stagnation = stagnation
+        self.max_evaluations = max_evaluations
+        self.start()
+
+    def start(self):
+        """Resets the counters and starts the clock."""
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + self.time_limit if self.time_limit is not None else math.inf
+        self.evaluations = 0
+        self.iterations = 0
+        self.best_length = math.inf
+        self.last_improvement = 0
+        self.reason = None
+        self.trace = []
+
+    def elapsed(self):
+        """Seconds since start()."""
+        return time.perf_counter() - self.start_time
+
+    def update(self, best_length, evaluations=0):
+        """
+        Records one iteration of the solver and checks every criterion.
+
+        :param best_length: Best tour length found so far (float)
+        :param evaluations: Tour evaluations done in this iteration (int, optional)
+        :return: True if the solver must stop; reason tells which criterion fired
+        :rtype: bool
+        """
+        now = time.perf_counter()
+        self.iterations += 1
+        self.evaluations += evaluations
+        if best_length < self.best_length * (1 - IMPROVEMENT_TOLERANCE):
+            self.best_length = best_length
+            self.last_improvement = self.iterations
+            self.trace.append((now - self.start_time, self.evaluations, best_length))
+        if self.target_length is not None and self.best_length <= self.target_length * (1 + self.target_gap):
+            self.reason = "target"
+        elif now >= self.deadline:
+            self.reason = "time_limit"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = "max_evaluations"
+        elif self.stagnation is not None and self.iterations - self.last_improvement >= self.stagnation:
+            self.reason = "stagnation"
+        return self.reason is not None
+
+    def expired(self):
+        """Deadline check alone, for inner loops that run between two update() calls."""
+        return time.perf_counter() >= self.deadline
+
+    def finish(self, reason):
+        """Records the solver's own limit as the reason when no criterion fired."""
+        if self.reason is None:
+            self.reason = reason
+        return self.reason
+
+    def __repr__(self):
+        return (f"StoppingCriteria(time_limit={self.time_limit}, target_length={self.target_length}, "
+                f"target_gap={self.target_gap}, stagnation={self.stagnation}, "
+                f"max_evaluations={self.max_evaluations}, reason={self.reason})")